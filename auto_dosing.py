@@ -4,150 +4,384 @@ NuTetra Auto Dosing Module
 Implements automated pH and EC monitoring and control for hydroponic systems.
 """
 import asyncio
+import atexit
+import functools
+import inspect
 import logging
+import queue
+import random
+import statistics
 import time
 import json
+import math
+import os
+import sys
+from array import array
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any, Callable
-
-# Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,  # Change to DEBUG to get more detailed logging
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("auto_dosing.log"),
-        logging.StreamHandler()
-    ]
-)
+from enum import Enum
+from itertools import islice
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
+from typing import Awaitable, Deque, Dict, List, NamedTuple, Optional, Tuple, Union, Any, Callable
+
+# Use the fastest available JSON backend for history exports
+try:
+    import orjson
+
+    def _dumps(obj: Any, pretty: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+except ImportError:
+    try:
+        import ujson as _json
+    except ImportError:
+        _json = json
+
+    def _dumps(obj: Any, pretty: bool = False) -> bytes:
+        if pretty:
+            return _json.dumps(obj, indent=2).encode()
+        if _json is json:
+            return json.dumps(obj, separators=(',', ':')).encode()
+        return _json.dumps(obj).encode()
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# No handlers are attached at import; applications call configure_logging()
+# or set up logging themselves
 logger = logging.getLogger("auto_dosing")
 
+
+def configure_logging(level: int = logging.INFO, logfile: str = "auto_dosing.log",
+                      max_bytes: int = 2 * 1024 * 1024, backup_count: int = 3,
+                      buffer_capacity: int = 64) -> None:
+    """
+    Send log output to a rotating file and the console.
+    
+    Records are queued and written by a background listener thread so file
+    and console output never block the event loop. File output is buffered
+    and written every buffer_capacity records, on any WARNING or above, and
+    at exit, to keep writes to SD cards down. Does nothing if the root
+    logger already has handlers.
+    
+    Args:
+        level: Root logger level (use logging.DEBUG for detailed output)
+        logfile: Path of the log file
+        max_bytes: Size at which the log file is rotated
+        backup_count: Number of rotated log files to keep
+        buffer_capacity: Number of records buffered before a file write
+    """
+    root_logger = logging.getLogger()
+    if root_logger.handlers:
+        return
+    
+    formatter = logging.Formatter(LOG_FORMAT)
+    # delay=True: the file is only opened once the first buffered records are written
+    file_handler = RotatingFileHandler(logfile, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+    console_handler = logging.StreamHandler()
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+    buffered_file_handler = MemoryHandler(buffer_capacity, flushLevel=logging.WARNING, target=file_handler)
+    
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    listener = QueueListener(log_queue, buffered_file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    # Stop the listener first, then flush whatever is still buffered
+    atexit.register(buffered_file_handler.close)
+    atexit.register(listener.stop)
+    
+    root_logger.addHandler(QueueHandler(log_queue))
+    root_logger.setLevel(level)
+
+
 # Default constants for pH and EC tolerance
 DEFAULT_PH_BUFFER = 0.2
 DEFAULT_EC_BUFFER = 0.2
 
+# Maximum number of dosing/sensor history entries kept in memory
+MAX_HISTORY_ENTRIES = 1000
+
+# Placeholder for missing readings in the typed sensor arrays
+_NAN = float('nan')
+
+# A trend only counts as moving towards target if it would get there within this many checks
+TREND_HORIZON_CHECKS = 3
+
+# Seconds stop() lets an in-flight dose finish before cancelling the monitoring task
+STOP_TIMEOUT = 5.0
+
+
+@functools.lru_cache(maxsize=128)
+def _iso_second(seconds: int) -> str:
+    """Format a whole-second epoch timestamp as a local ISO-8601 string."""
+    return datetime.fromtimestamp(seconds).isoformat()
+
+
+def _iso(timestamp_ns: int) -> str:
+    """Format a time.time_ns() timestamp as a local ISO-8601 string."""
+    seconds, nanoseconds = divmod(timestamp_ns, 1_000_000_000)
+    return f"{_iso_second(seconds)}.{nanoseconds // 1000:06d}"
+
+
+def _with_iso_timestamp(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a history record with its timestamp rendered as ISO-8601."""
+    return {**record, "timestamp": _iso(record["timestamp"])}
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    """Map the NaN placeholder used in sensor arrays back to None."""
+    return None if math.isnan(value) else value
+
+
+class DosingState(Enum):
+    """Lifecycle state of the monitoring task."""
+    STOPPED = "stopped"
+    RUNNING = "running"
+    STOPPING = "stopping"
+
+
+class BatchDispenseError(Exception):
+    """Raised by a batch dispense function that stopped part-way through its doses."""
+    
+    def __init__(self, message: str, dispensed: int):
+        super().__init__(message)
+        # Number of doses, from the start of the batch, that were dispensed
+        self.dispensed = dispensed
+
+
+class ProfileTargets(NamedTuple):
+    """Dosing targets extracted from a plant profile."""
+    target_ph: float
+    ph_buffer: float
+    target_ec: float
+    ec_buffer: float
+    nutrient_pumps: Tuple[Tuple[str, float, str], ...]  # (pump_name, dosage, product_name)
+
+
 class AutoDosing:
     """
     Auto Dosing controller that monitors pH and EC levels and automatically 
     adjusts them according to the plant profile targets.
     """
     
+    # Timing settings that can be changed at runtime via set_config()
+    _CONFIG_KEYS = ("check_interval", "dosing_cooldown", "between_dose_delay", "parallel_dosing")
+    
+    # Fixed attribute layout: faster attribute access in the monitoring loop
+    # and typos in attribute assignments fail loudly
+    __slots__ = (
+        "get_sensor_readings", "get_active_profile", "dispense_pump", "dispense_pump_batch",
+        "check_interval", "dosing_cooldown", "between_dose_delay", "ema_alpha", "trend_window",
+        "parallel_dosing", "profile_cache_ttl", "_config_view",
+        "_state", "task", "last_dosing_time", "last_check_time", "_last_dosing_mono", "_last_check_mono",
+        "_stop_event", "_wake", "_check_requested",
+        "_profile_cache", "_active_targets", "_active_profile_ts",
+        "dosing_history", "_dosing_seq", "history_version", "_sensor_seq", "_sensor_ts", "_sensor_ph", "_sensor_ec", "_sensor_temp",
+        "_ph_ema", "_ec_ema", "_bad_reading_count",
+    )
+    
     def __init__(
         self,
-        get_sensor_readings_func: Callable[[], Dict[str, float]],
+        get_sensor_readings_func: Callable[[], Union[Dict[str, float], List[Dict[str, float]]]],
         get_active_profile_func: Callable[[], Dict[str, Any]],
-        dispense_pump_func: Callable[[str, float, float], None],
+        dispense_pump_func: Callable[[str, float, float], Optional[Awaitable[None]]],
         check_interval: int = 60,
         dosing_cooldown: int = 60,
-        between_dose_delay: int = 30
+        between_dose_delay: int = 30,
+        ema_alpha: float = 0.3,
+        trend_window: int = 5,
+        parallel_dosing: bool = False,
+        profile_cache_ttl: float = 0,
+        dispense_pump_batch_func: Optional[Callable[[List[Tuple[str, float, float]]], Optional[Awaitable[None]]]] = None
     ):
         """
         Initialize the auto dosing controller.
         
         Args:
-            get_sensor_readings_func: Function to get current sensor readings
-                Should return dict with 'ph', 'ec', and 'waterTemp' keys
-            get_active_profile_func: Function to get the active plant profile
+            get_sensor_readings_func: Function to get current sensor readings (run in a worker thread)
+                Should return dict with 'ph', 'ec', and 'waterTemp' keys, or a
+                list of such dicts (oldest first) collected since the last call;
+                batched readings may carry an epoch-seconds 'timestamp'
+            get_active_profile_func: Function to get the active plant profile (run in a worker thread)
                 Should return a profile with targetPh, targetEc, and pumpAssignments
             dispense_pump_func: Function to dispense from a pump
-                Should accept pump name, amount (ml), and flow rate (ml/s)
+                Should accept pump name, amount (ml), and flow rate (ml/s).
+                Coroutine functions are awaited; plain functions are run in a
+                worker thread so they may block on hardware I/O
             check_interval: Time in seconds between sensor checks
             dosing_cooldown: Time in seconds to wait after a dosing cycle
             between_dose_delay: Time in seconds to wait between individual doses
+            ema_alpha: Smoothing factor for the pH/EC moving average used in
+                dosing decisions (1.0 disables smoothing)
+            trend_window: Number of recent readings used to detect whether pH/EC
+                is already moving towards target, in which case dosing is
+                skipped for that cycle (values below 3 disable the check)
+            parallel_dosing: Dispense all nutrient pumps at once, followed by a
+                single between_dose_delay. Only enable this if the pump
+                controller supports concurrent channels.
+            profile_cache_ttl: Time in seconds to reuse the active profile
+                before fetching it again. The default of 0 fetches it every
+                check, so a profile switch applies on the next check;
+                unchanged profiles are still not re-parsed
+            dispense_pump_batch_func: Optional function that dispenses several
+                nutrient doses back to back in one call. Receives a list of
+                (pump name, amount, flow rate) tuples and should raise
+                BatchDispenseError if it fails part-way. Only used for EC
+                adjustment when between_dose_delay is 0 and parallel_dosing is
+                off, since waits between doses must stay interruptible by
+                stop(). May be sync or async, like dispense_pump_func.
         """
         self.get_sensor_readings = get_sensor_readings_func
         self.get_active_profile = get_active_profile_func
         self.dispense_pump = dispense_pump_func
+        self.dispense_pump_batch = dispense_pump_batch_func
         
         # Configuration settings
         self.check_interval = check_interval
         self.dosing_cooldown = dosing_cooldown
         self.between_dose_delay = between_dose_delay
+        self.ema_alpha = ema_alpha
+        self.trend_window = trend_window
+        self.parallel_dosing = parallel_dosing
+        self.profile_cache_ttl = profile_cache_ttl
+        self._config_view = self._build_config_view()
         
         # State management
-        self.enabled = False
-        self.running = False
+        self._state = DosingState.STOPPED
         self.task: Optional[asyncio.Task] = None
+        # Wall-clock times are reported in status; interval math uses the
+        # monotonic clock so NTP adjustments can't skew scheduling
         self.last_dosing_time = 0
         self.last_check_time = 0
+        self._last_dosing_mono = -math.inf
+        self._last_check_mono = -math.inf
+        self._stop_event = asyncio.Event()
+        # Set to interrupt the sleep between checks (config change, forced check or stop)
+        self._wake = asyncio.Event()
+        self._check_requested = False
+        
+        # Parsed targets for the most recently seen profile: (key, profile, targets)
+        self._profile_cache: Tuple[Any, Optional[Dict[str, Any]], Optional[ProfileTargets]] = (None, None, None)
+        # Targets of the last fetched active profile and the monotonic time it was fetched
+        self._active_targets: Optional[ProfileTargets] = None
+        self._active_profile_ts = 0.0
         
         # Logging and history
-        self.dosing_history: List[Dict[str, Any]] = []
-        self.sensor_history: List[Dict[str, Any]] = []
+        self.dosing_history: Deque[Dict[str, Any]] = deque(maxlen=MAX_HISTORY_ENTRIES)
+        # Bumped whenever a dosing or sensor record is added; the new value is that
+        # record's sequence number, used as the get_history() cursor. Seeded from the
+        # clock so cursors handed out by a previous run sort before this run's records
+        self.history_version = time.time_ns()
+        # Sequence numbers of the dosing records, parallel to dosing_history
+        self._dosing_seq: Deque[int] = deque(maxlen=MAX_HISTORY_ENTRIES)
+        # Sensor readings are stored column-wise in typed arrays; missing values are NaN
+        self._sensor_seq = array('q')
+        self._sensor_ts = array('q')
+        self._sensor_ph = array('d')
+        self._sensor_ec = array('d')
+        self._sensor_temp = array('d')
+        
+        # Exponential moving averages of recent readings, used to filter sensor noise
+        self._ph_ema: Optional[float] = None
+        self._ec_ema: Optional[float] = None
+        # Consecutive polls where the sensors returned no values at all
+        self._bad_reading_count = 0
         
         logger.info("Auto Dosing controller initialized")
     
+    @property
+    def state(self) -> DosingState:
+        """Current lifecycle state of the monitoring task."""
+        return self._state
+    
+    @property
+    def running(self) -> bool:
+        """True while the monitoring task is alive and has not been asked to stop."""
+        return self._state is DosingState.RUNNING and self.task is not None and not self.task.done()
+    
+    @property
+    def enabled(self) -> bool:
+        """Alias of running, kept for callers and the status payload."""
+        return self.running
+    
     async def start(self) -> None:
         """Start the auto dosing task."""
         if self.running:
             logger.warning("Auto dosing is already running")
             return
+        
+        # Let a previous loop that is still winding down exit first
+        if self.task and not self.task.done():
+            logger.warning("Found existing task that's still active - stopping it first")
+            self._state = DosingState.STOPPING
+            self._stop_event.set()
+            self._wake.set()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
             
-        self.enabled = True
-        self.running = True
+        self._state = DosingState.RUNNING
+        self._stop_event.clear()
         logger.info("Starting auto dosing task")
         
-        # Create and start the background task with extra protection
         try:
-            # Cancel any existing task first
-            if self.task and not self.task.done() and not self.task.cancelled():
-                logger.warning("Found existing task that's still active - cancelling it first")
-                self.task.cancel()
-                try:
-                    await asyncio.wait_for(self.task, timeout=3.0)
-                except (asyncio.CancelledError, asyncio.TimeoutError):
-                    pass
-            
-            # Reset fields
             self.task = asyncio.create_task(self._monitoring_loop())
             # Ensure we don't lose the task reference
-            self.task.add_done_callback(
-                lambda t: logger.warning(f"Auto dosing task completed: {t.exception() if t.exception() else 'No exception'}")
-            )
-            # Wait a moment to ensure the task has actually started
-            await asyncio.sleep(1)
+            self.task.add_done_callback(self._on_task_done)
             logger.info("Auto dosing task created successfully")
         except Exception as e:
-            logger.error(f"Error creating auto dosing task: {e}")
-            self.enabled = False
-            self.running = False
+            logger.error("Error creating auto dosing task: %s", e)
+            self._state = DosingState.STOPPED
     
-    async def stop(self) -> None:
-        """Stop the auto dosing task."""
-        logger.info("Stopping auto dosing task: setting flags...")
+    async def stop(self, timeout: float = STOP_TIMEOUT) -> None:
+        """
+        Stop the auto dosing task.
+        
+        Args:
+            timeout: Time in seconds to let an in-flight dose finish before
+                the task is cancelled
+        """
+        logger.info("Stopping auto dosing task")
         
-        # Make sure we set these flags first before anything else
-        self.enabled = False
-        self.running = False
+        self._state = DosingState.STOPPING
+        # Wake the monitoring loop so it exits at its next sleep
+        self._stop_event.set()
+        self._wake.set()
         
         if not self.task:
             logger.warning("No task to stop - already stopped")
+            self._state = DosingState.STOPPED
             return
             
         try:
-            logger.info("Cancelling auto dosing task")
+            # shield() keeps the timeout from cancelling the task; that is done explicitly below
+            await asyncio.wait_for(asyncio.shield(self.task), timeout=timeout)
+            logger.info("Auto dosing task stopped")
+        except asyncio.TimeoutError:
+            logger.warning("Auto dosing task did not stop within %ss, cancelling it", timeout)
             self.task.cancel()
-            
             try:
-                # Wait with timeout for task to actually stop
-                await asyncio.wait_for(self.task, timeout=5.0)
-                logger.info("Auto dosing task cancelled successfully")
-            except asyncio.TimeoutError:
-                logger.warning("Timeout waiting for task to cancel - forcing completion")
+                await self.task
             except asyncio.CancelledError:
-                logger.info("Task cancelled normally")
+                logger.info("Auto dosing task was cancelled")
             except Exception as e:
-                logger.error(f"Error waiting for task cancellation: {e}")
-                
-            # Ensure the task is done regardless
-            if not self.task.done():
-                logger.warning("Task not marked as done after cancellation - this indicates a potential issue")
-                
+                logger.error("Error stopping auto dosing task: %s", e)
+        except asyncio.CancelledError:
+            logger.info("Auto dosing task was cancelled")
         except Exception as e:
-            logger.error(f"Error stopping auto dosing task: {e}")
+            logger.error("Error stopping auto dosing task: %s", e)
         finally:
             self.task = None
+            self._state = DosingState.STOPPED
             logger.info("Auto dosing task reference cleared")
     
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        """Log how the monitoring task finished."""
+        if task.cancelled():
+            logger.warning("Auto dosing task completed: cancelled")
+        else:
+            logger.warning("Auto dosing task completed: %s", task.exception() or 'No exception')
+    
     async def _monitoring_loop(self) -> None:
         """Main monitoring loop that checks sensor data and triggers dosing."""
         logger.info("Auto dosing monitoring loop started")
@@ -157,92 +391,98 @@ class AutoDosing:
         
         while True:
             try:
-                # Double-check these flags at the start of each iteration
-                if not self.enabled or not self.running:
+                if self._stop_event.is_set():
                     logger.info("Auto dosing has been disabled - exiting monitoring loop")
                     break
                     
-                # Check if enough time has passed since the last check
-                current_time = time.time()
-                if current_time - self.last_check_time < self.check_interval:
-                    await asyncio.sleep(1)
-                    continue
+                # Sleep once until the next check is due instead of polling
+                if await self._sleep_until_next_check():
+                    logger.info("Auto dosing has been stopped - exiting monitoring loop")
+                    break
                 
-                self.last_check_time = current_time
+                check_interval = self.check_interval
+                now = time.monotonic()
+                self.last_check_time = time.time()
+                self._last_check_mono = now
+                # Read after the sleep so config updates made meanwhile apply to this cycle
+                dosing_cooldown = self.dosing_cooldown
+                
+                # Read the sensors and (when its cache has expired) the active profile
+                # concurrently; errors are handled separately in the sections below
+                readings, targets = await asyncio.gather(
+                    # Sensor reads block on hardware/network I/O, so run them in a worker thread
+                    asyncio.to_thread(self.get_sensor_readings),
+                    self._get_active_targets(),
+                    return_exceptions=True
+                )
+                # stop() may have been called while the sensors were read; don't dose after it
+                if self._stop_event.is_set():
+                    logger.info("Auto dosing has been stopped - exiting monitoring loop")
+                    break
                 
                 # Get current sensor readings
                 try:
-                    readings = self.get_sensor_readings()
-                    current_ph = readings.get('ph')
-                    current_ec = readings.get('ec')
-                    water_temp = readings.get('waterTemp')
+                    if isinstance(readings, Exception):
+                        raise readings
+                    # Accept either a single reading or a batch collected since the last call
+                    batch = readings if isinstance(readings, list) else [readings]
+                    if not batch:
+                        logger.warning("Sensor batch was empty, skipping this check")
+                        continue
                     
-                    # Record sensor readings
-                    self._log_sensor_reading(current_ph, current_ec, water_temp)
+                    # Record every reading, but act on the most recent one
+                    log_sensor_reading = self._log_sensor_reading
+                    for reading in batch:
+                        log_sensor_reading(reading.get('ph'), reading.get('ec'), reading.get('waterTemp'),
+                                           reading.get('timestamp'))
+                    latest = batch[-1]
+                    current_ph = latest.get('ph')
+                    current_ec = latest.get('ec')
+                    
+                    # Don't act on stale averages while the sensors aren't answering;
+                    # warn once on the transition rather than on every poll
+                    if current_ph is None and current_ec is None and latest.get('waterTemp') is None:
+                        self._bad_reading_count += 1
+                        if self._bad_reading_count == 1:
+                            logger.warning("Sensor readings unavailable, skipping checks until they recover")
+                        continue
+                    if self._bad_reading_count:
+                        logger.info("Sensor readings recovered after %d failed polls", self._bad_reading_count)
+                        self._bad_reading_count = 0
+                    
+                    # Act on the smoothed values so a single noisy sample doesn't trigger a dose
+                    if self._ph_ema is not None:
+                        current_ph = self._ph_ema
+                    if self._ec_ema is not None:
+                        current_ec = self._ec_ema
                 except Exception as e:
-                    logger.error(f"Error getting sensor readings: {e}")
-                    await asyncio.sleep(30)  # Wait before trying again
+                    # Sensor I/O glitches are usually transient: retry at the next
+                    # scheduled check without counting towards the restart limit
+                    logger.error("Error getting sensor readings: %s", e)
                     continue
                 
+                # A successful read means the loop is healthy again
+                restart_count = 0
+                
                 # Get active profile and determine targets
                 try:
-                    # Get active profile
-                    profile = self.get_active_profile()
-                    if not profile:
+                    if isinstance(targets, Exception):
+                        raise targets
+                    if targets is None:
                         logger.warning("No active profile found, skipping auto-dosing check but continuing to monitor")
-                        await asyncio.sleep(self.check_interval)
                         continue
                     
-                    # Extract target values and pump assignments
-                    try:
-                        # Try to get target from profile
-                        target_ph = None
-                        if profile.get('targetPh', {}).get('target') is not None:
-                            target_ph = profile.get('targetPh', {}).get('target')
-                        # If not found, calculate from min/max if available
-                        elif profile.get('targetPh', {}).get('min') is not None and profile.get('targetPh', {}).get('max') is not None:
-                            min_ph = float(profile.get('targetPh', {}).get('min', 0))
-                            max_ph = float(profile.get('targetPh', {}).get('max', 0))
-                            target_ph = min_ph + (max_ph - min_ph) / 2
-                        # Default value if all else fails
-                        else:
-                            target_ph = 6.0
-                            
-                        # Get pH buffer (tolerance)
-                        ph_buffer = profile.get('targetPh', {}).get('buffer', DEFAULT_PH_BUFFER)
-                        
-                        # Same logic for EC
-                        target_ec = None
-                        if profile.get('targetEc', {}).get('target') is not None:
-                            target_ec = profile.get('targetEc', {}).get('target')
-                        elif profile.get('targetEc', {}).get('min') is not None and profile.get('targetEc', {}).get('max') is not None:
-                            min_ec = float(profile.get('targetEc', {}).get('min', 0))
-                            max_ec = float(profile.get('targetEc', {}).get('max', 0))
-                            target_ec = min_ec + (max_ec - min_ec) / 2
-                        else:
-                            target_ec = 1.0
-                            
-                        ec_buffer = profile.get('targetEc', {}).get('buffer', DEFAULT_EC_BUFFER)
-                        
-                        # Get pump assignments
-                        pump_assignments = profile.get('pumpAssignments', [])
-                        
-                        logger.debug(f"Extracted from profile: target_ph={target_ph}, ph_buffer={ph_buffer}, "
-                                   f"target_ec={target_ec}, ec_buffer={ec_buffer}, pumps={len(pump_assignments)}")
-                    except Exception as e:
-                        logger.error(f"Error parsing profile values: {e}")
-                        target_ph = 6.0
-                        ph_buffer = DEFAULT_PH_BUFFER
-                        target_ec = 1.0
-                        ec_buffer = DEFAULT_EC_BUFFER
-                        pump_assignments = []
+                    target_ph, ph_buffer = targets.target_ph, targets.ph_buffer
+                    target_ec, ec_buffer = targets.target_ec, targets.ec_buffer
                 
                     # If we're in cooldown period after dosing, skip this cycle
                     # Always use the current instance value of dosing_cooldown
-                    if current_time - self.last_dosing_time < self.dosing_cooldown:
-                        logger.debug(f"Using current dosing_cooldown value: {self.dosing_cooldown}s")
-                        logger.info(f"In cooldown period, {int(self.dosing_cooldown - (current_time - self.last_dosing_time))}s remaining")
-                        await asyncio.sleep(5)  # Check more frequently during cooldown
+                    since_dosing = now - self._last_dosing_mono
+                    if since_dosing < dosing_cooldown:
+                        cooldown_remaining = dosing_cooldown - since_dosing
+                        logger.debug("Using current dosing_cooldown value: %ss", dosing_cooldown)
+                        logger.info("In cooldown period, %ds remaining", math.ceil(cooldown_remaining))
+                        # Fall through to the single scheduled sleep at the top of the loop
                         continue
                     
                     # Check if dosing is needed
@@ -252,66 +492,279 @@ class AutoDosing:
                     try:
                         # Use the profile's buffer values for pH and EC tolerance
                         need_ph_adjustment = self._check_ph_adjustment(current_ph, target_ph, ph_buffer)
-                        logger.debug(f"Using profile's pH buffer: {ph_buffer}")
+                        logger.debug("Using profile's pH buffer: %s", ph_buffer)
                         
                         # Only check EC if pH is in acceptable range
                         if not need_ph_adjustment:
                             need_ec_adjustment = self._check_ec_adjustment(current_ec, target_ec, ec_buffer)
-                            logger.debug(f"Using profile's EC buffer: {ec_buffer}")
+                            logger.debug("Using profile's EC buffer: %s", ec_buffer)
                     except Exception as e:
-                        logger.error(f"Error checking if adjustment needed: {e}")
+                        logger.error("Error checking if adjustment needed: %s", e)
                      
                     # Perform dosing if needed
                     if need_ph_adjustment:
-                        logger.info(f"pH adjustment needed: current={current_ph}, target={target_ph}±{ph_buffer}")
-                        try:
-                            await self._adjust_ph(current_ph, target_ph)
-                            self.last_dosing_time = time.time()
-                        except Exception as e:
-                            logger.error(f"Error adjusting pH: {e}")
+                        logger.info("pH adjustment needed: current=%s, target=%s±%s", current_ph, target_ph, ph_buffer)
+                        if self._is_trending_toward(self._sensor_ph, current_ph, target_ph):
+                            logger.info("pH is already moving towards target, skipping dose this cycle")
+                        else:
+                            try:
+                                await self._adjust_ph(current_ph, target_ph)
+                                self._mark_dosed()
+                            except Exception as e:
+                                logger.error("Error adjusting pH: %s", e)
                         
-                    elif need_ec_adjustment and pump_assignments:
-                        logger.info(f"EC adjustment needed: current={current_ec}, target={target_ec}±{ec_buffer}")
-                        try:
-                            await self._adjust_ec(current_ec, target_ec, pump_assignments)
-                            self.last_dosing_time = time.time()
-                        except Exception as e:
-                            logger.error(f"Error adjusting EC: {e}")
+                    elif need_ec_adjustment and targets.nutrient_pumps:
+                        logger.info("EC adjustment needed: current=%s, target=%s±%s", current_ec, target_ec, ec_buffer)
+                        if self._is_trending_toward(self._sensor_ec, current_ec, target_ec):
+                            logger.info("EC is already moving towards target, skipping dose this cycle")
+                        else:
+                            try:
+                                await self._adjust_ec(current_ec, target_ec, targets.nutrient_pumps)
+                                self._mark_dosed()
+                            except Exception as e:
+                                logger.error("Error adjusting EC: %s", e)
                         
                     else:
-                        logger.info(f"No dosing needed. pH={current_ph} (target={target_ph}±{ph_buffer}), EC={current_ec} (target={target_ec}±{ec_buffer})")
+                        logger.info("No dosing needed. pH=%s (target=%s±%s), EC=%s (target=%s±%s)",
+                                    current_ph, target_ph, ph_buffer, current_ec, target_ec, ec_buffer)
                         # Even when no dosing is needed, we should NOT cancel the task
                 except Exception as e:
-                    logger.error(f"Error in profile processing: {e}")
+                    logger.error("Error in profile processing: %s", e)
                 
-                # Wait for next check cycle - make sure it doesn't exit
-                logger.debug(f"Waiting for {self.check_interval} seconds until next check")
-                await asyncio.sleep(self.check_interval)
-                logger.debug("Completed sleep, continuing monitoring loop")
-                
-                # Reset restart counter on successful cycle
-                restart_count = 0
-                
-            except asyncio.CancelledError:
-                logger.info("Auto dosing task cancelled by external request")
-                # Break the loop immediately - don't try to continue or restart
-                logger.info("Breaking monitoring loop due to cancellation")
-                break
+                # The next check is scheduled by the single sleep at the top of the loop
+                logger.debug("Next check in %s seconds", check_interval)
                 
             except Exception as e:
                 restart_count += 1
-                logger.error(f"Error in auto dosing monitoring loop: {str(e)} (restart {restart_count}/{max_restarts})", exc_info=True)
+                # Tracebacks are only formatted when debugging, so repeated faults stay cheap
+                logger.error("Error in auto dosing monitoring loop: %s (restart %d/%d)", e, restart_count, max_restarts,
+                             exc_info=logger.isEnabledFor(logging.DEBUG))
                 
                 if restart_count >= max_restarts:
-                    logger.error(f"Too many errors ({restart_count}), stopping auto dosing")
-                    self.enabled = False
-                    self.running = False
+                    logger.error("Too many errors (%s), stopping auto dosing", restart_count)
+                    self._state = DosingState.STOPPED
                     break
                     
-                # Wait a bit before retrying, with increasing delay
-                await asyncio.sleep(10 * restart_count)
+                # Back off exponentially before retrying
+                if await self._wait(self._backoff_delay(restart_count)):
+                    break
+    
+    def _is_trending_toward(self, column: "array[float]", current: float, target: float) -> bool:
+        """
+        Check whether recent readings are already moving towards the target.
+        
+        Fits a least-squares line through the last trend_window readings of a
+        sensor column (ignoring missing values) against their timestamps. The
+        slope must be steep enough to reach the target within
+        TREND_HORIZON_CHECKS check intervals, so sensor noise on a flat
+        reading doesn't skip doses.
+        
+        Args:
+            column: Sensor value array (self._sensor_ph or self._sensor_ec)
+            current: Current (smoothed) value
+            target: Target value
+        
+        Returns:
+            True if the slope reaches the target soon enough, False otherwise
+            or if there are too few readings to tell
+        """
+        window = self.trend_window
+        if window < 3:
+            return False
+        
+        start = max(0, len(column) - window)
+        points = [(ts, value) for ts, value in zip(self._sensor_ts[start:], column[start:])
+                  if not math.isnan(value)]
+        if len(points) < 3:
+            return False
+        
+        first_ts = points[0][0]
+        try:
+            slope, _ = statistics.linear_regression(
+                [(ts - first_ts) / 1_000_000_000 for ts, _ in points],
+                [value for _, value in points]
+            )
+        except statistics.StatisticsError:
+            # All readings share a timestamp
+            return False
+        if slope == 0 or (slope > 0) != (target > current):
+            return False
+        # Seconds until the fitted trend reaches the target
+        return (target - current) / slope <= TREND_HORIZON_CHECKS * self.check_interval
+    
+    def _mark_dosed(self) -> None:
+        """
+        Start the dosing cooldown from now, i.e. once the dosing cycle has finished.
+        
+        The moving averages are reseeded from the next reading: they would
+        otherwise lag behind the dose and trigger another one after the cooldown.
+        """
+        self.last_dosing_time = time.time()
+        self._last_dosing_mono = time.monotonic()
+        self._ph_ema = None
+        self._ec_ema = None
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """
+        Compute the delay before retrying after an unexpected error.
+        
+        Args:
+            attempt: Number of consecutive failures so far
+        
+        Returns:
+            Exponential delay capped at check_interval, plus up to 1s of jitter
+        """
+        return min(self.check_interval, 2 ** attempt) + random.uniform(0, 1)
+    
+    async def _get_active_targets(self) -> Optional[ProfileTargets]:
+        """
+        Return the active profile's targets, fetching the profile at most once
+        per profile_cache_ttl and parsing it only when it has changed.
+        
+        Returns:
+            Parsed ProfileTargets, or None if there is no active profile
+        """
+        now = time.monotonic()
+        if self._active_targets is None or now - self._active_profile_ts >= self.profile_cache_ttl:
+            profile = await asyncio.to_thread(self.get_active_profile)
+            self._active_targets = self._get_profile_targets(profile) if profile else None
+            self._active_profile_ts = now
+        return self._active_targets
+    
+    def invalidate_profile_cache(self) -> None:
+        """Fetch the active profile again at the next check (e.g. after it was edited)."""
+        self._active_targets = None
+    
+    def _get_profile_targets(self, profile: Dict[str, Any]) -> ProfileTargets:
+        """
+        Return the parsed targets for a profile, re-parsing only when it changes.
+        
+        Profiles are keyed by name and updatedAt when available; otherwise the
+        cached profile object itself is the key.
+        
+        Args:
+            profile: Active plant profile
+        
+        Returns:
+            Parsed ProfileTargets for the profile
+        """
+        updated_at = profile.get('updatedAt')
+        key = (profile.get('name'), updated_at) if updated_at else id(profile)
+        cached_key, _, cached_targets = self._profile_cache
+        if cached_targets is not None and key == cached_key:
+            return cached_targets
+        
+        targets = self._parse_profile(profile)
+        # Keep a reference to the profile so an id()-based key cannot be reused
+        self._profile_cache = (key, profile, targets)
+        return targets
+    
+    def _parse_profile(self, profile: Dict[str, Any]) -> ProfileTargets:
+        """
+        Extract target values and nutrient pumps from a profile.
+        
+        Args:
+            profile: Active plant profile
+        
+        Returns:
+            ProfileTargets with defaults substituted for missing values
+        """
+        try:
+            ph_settings = profile.get('targetPh') or {}
+            ec_settings = profile.get('targetEc') or {}
+            
+            # Try to get target from profile
+            target_ph = ph_settings.get('target')
+            if target_ph is None:
+                # If not found, calculate from min/max if available
+                min_ph = ph_settings.get('min')
+                max_ph = ph_settings.get('max')
+                if min_ph is not None and max_ph is not None:
+                    min_ph, max_ph = float(min_ph), float(max_ph)
+                    target_ph = min_ph + (max_ph - min_ph) / 2
+                # Default value if all else fails
+                else:
+                    target_ph = 6.0
+                
+            # Get pH buffer (tolerance)
+            ph_buffer = ph_settings.get('buffer', DEFAULT_PH_BUFFER)
+            
+            # Same logic for EC
+            target_ec = ec_settings.get('target')
+            if target_ec is None:
+                min_ec = ec_settings.get('min')
+                max_ec = ec_settings.get('max')
+                if min_ec is not None and max_ec is not None:
+                    min_ec, max_ec = float(min_ec), float(max_ec)
+                    target_ec = min_ec + (max_ec - min_ec) / 2
+                else:
+                    target_ec = 1.0
+                
+            ec_buffer = ec_settings.get('buffer', DEFAULT_EC_BUFFER)
+            
+            # Filter to only nutrient pumps with active dosage
+            pump_assignments = profile.get('pumpAssignments', [])
+            nutrient_pumps = tuple(
+                (p['pumpName'], p['dosage'], p.get('productName', 'Unknown nutrient'))
+                for p in pump_assignments
+                if p.get('dosage', 0) > 0 and p.get('pumpName', '').startswith('Pump')
+            )
+            if pump_assignments and not nutrient_pumps:
+                logger.warning("No nutrient pumps with dosage assignments found")
+            
+            logger.debug("Extracted from profile: target_ph=%s, ph_buffer=%s, target_ec=%s, ec_buffer=%s, pumps=%d",
+                         target_ph, ph_buffer, target_ec, ec_buffer, len(nutrient_pumps))
+            return ProfileTargets(target_ph, ph_buffer, target_ec, ec_buffer, nutrient_pumps)
+        except Exception as e:
+            logger.error("Error parsing profile values: %s", e)
+            return ProfileTargets(6.0, DEFAULT_PH_BUFFER, 1.0, DEFAULT_EC_BUFFER, ())
+    
+    async def _sleep_until_next_check(self) -> bool:
+        """
+        Sleep until the next sensor check is due.
+        
+        The deadline is recomputed whenever the loop is woken, so a changed
+        check_interval applies immediately; request_check() ends the sleep.
+        
+        Returns:
+            True if a stop was requested, False when it's time to check
+        """
+        while not self._stop_event.is_set():
+            sleep_for = self.check_interval - (time.monotonic() - self._last_check_mono)
+            if sleep_for <= 0 or self._check_requested:
+                self._check_requested = False
+                return False
+            
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=sleep_for)
+            except asyncio.TimeoutError:
+                pass
+        return True
+    
+    def request_check(self) -> None:
+        """Run a sensor check now instead of waiting for the next interval."""
+        self._check_requested = True
+        self._wake.set()
+    
+    async def _wait(self, timeout: float) -> bool:
+        """
+        Sleep for up to `timeout` seconds, waking early if stop() is called.
+        
+        Args:
+            timeout: Maximum time to sleep in seconds
+        
+        Returns:
+            True if a stop was requested, False if the timeout elapsed
+        """
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
     
-    def _check_ph_adjustment(self, current_ph: float, target_ph: float, buffer: float) -> bool:
+    @staticmethod
+    def _check_ph_adjustment(current_ph: float, target_ph: float, buffer: float) -> bool:
         """
         Check if pH adjustment is needed based on current readings and target.
         
@@ -325,7 +778,8 @@ class AutoDosing:
         """
         return abs(current_ph - target_ph) > buffer
     
-    def _check_ec_adjustment(self, current_ec: float, target_ec: float, buffer: float) -> bool:
+    @staticmethod
+    def _check_ec_adjustment(current_ec: float, target_ec: float, buffer: float) -> bool:
         """
         Check if EC adjustment is needed based on current readings and target.
         Only increases EC, never decreases (as that would require water changes).
@@ -355,59 +809,57 @@ class AutoDosing:
             # Current pH is too high, need to lower it with pH Down
             pump_name = "pH Down"
             amount = 0.5  # Conservative initial dose (ml)
-            logger.info(f"Dosing {amount}ml of {pump_name} to lower pH from {current_ph} towards {target_ph}")
+            logger.info("Dosing %sml of %s to lower pH from %s towards %s", amount, pump_name, current_ph, target_ph)
         else:
             # Current pH is too low, need to raise it with pH Up
             pump_name = "pH Up"
             amount = 0.5  # Conservative initial dose (ml)
-            logger.info(f"Dosing {amount}ml of {pump_name} to raise pH from {current_ph} towards {target_ph}")
+            logger.info("Dosing %sml of %s to raise pH from %s towards %s", amount, pump_name, current_ph, target_ph)
         
         # Dispense the appropriate solution
         try:
-            self.dispense_pump(pump_name, amount, 1.0)  # 1.0 ml/s flow rate
+            await self._dispense(pump_name, amount)
             
             # Log the dosing action
             self._log_dosing_action(pump_name, amount, "pH adjustment", 
                                   current_value=current_ph, target_value=target_ph)
             
         except Exception as e:
-            logger.error(f"Error dispensing {pump_name}: {str(e)}")
+            logger.error("Error dispensing %s: %s", pump_name, e)
     
     async def _adjust_ec(self, current_ec: float, target_ec: float, 
-                       pump_assignments: List[Dict[str, Any]]) -> None:
+                       nutrient_pumps: Tuple[Tuple[str, float, str], ...]) -> None:
         """
         Adjust EC by dispensing nutrients according to pump assignments.
-        
+
         Args:
             current_ec: Current EC reading
             target_ec: Target EC value
-            pump_assignments: List of pump assignments with dosage information
+            nutrient_pumps: (pump_name, dosage, product_name) tuples with a
+                positive dosage, as pre-filtered by _parse_profile
         """
-        logger.info(f"Starting nutrient dosing cycle to raise EC from {current_ec} towards {target_ec}")
-        
-        # Filter to only pumps with active dosage
-        nutrient_pumps = [p for p in pump_assignments 
-                        if p.get('dosage', 0) > 0 and p.get('pumpName', '').startswith('Pump')]
-        
+        logger.info("Starting nutrient dosing cycle to raise EC from %s towards %s", current_ec, target_ec)
+
         if not nutrient_pumps:
             logger.warning("No nutrient pumps with dosage assignments found")
             return
         
+        if self.parallel_dosing:
+            await self._adjust_ec_parallel(current_ec, target_ec, nutrient_pumps)
+            return
+        
+        # A batch can't be interrupted, so only use it when there is no mixing wait between doses
+        if self.dispense_pump_batch is not None and self.between_dose_delay <= 0:
+            await self._adjust_ec_batch(current_ec, target_ec, nutrient_pumps)
+            return
+        
         # Dose each nutrient in sequence
-        for pump_info in nutrient_pumps:
-            pump_name = pump_info.get('pumpName')
-            dosage = pump_info.get('dosage', 0)
-            
-            if not pump_name or not dosage:
-                continue
-                
-            product_name = pump_info.get('productName', 'Unknown nutrient')
-            
-            logger.info(f"Dosing {dosage}ml of {product_name} from {pump_name}")
+        for pump_name, dosage, product_name in nutrient_pumps:
+            logger.info("Dosing %sml of %s from %s", dosage, product_name, pump_name)
             
             try:
                 # Dispense the nutrient
-                self.dispense_pump(pump_name, dosage, 1.0)  # 1.0 ml/s flow rate
+                await self._dispense(pump_name, dosage)
                 
                 # Log the dosing action
                 self._log_dosing_action(pump_name, dosage, "EC adjustment",
@@ -415,11 +867,88 @@ class AutoDosing:
                                       product_name=product_name)
                 
                 # Wait between doses - always use the current instance value
-                logger.debug(f"Using current between_dose_delay value: {self.between_dose_delay}s")
-                await asyncio.sleep(self.between_dose_delay)
+                logger.debug("Using current between_dose_delay value: %ss", self.between_dose_delay)
+                if await self._wait(self.between_dose_delay):
+                    logger.info("Stop requested - skipping remaining nutrient doses")
+                    return
                 
             except Exception as e:
-                logger.error(f"Error dispensing {product_name} from {pump_name}: {str(e)}")
+                logger.error("Error dispensing %s from %s: %s", product_name, pump_name, e)
+    
+    async def _adjust_ec_batch(self, current_ec: float, target_ec: float,
+                               nutrient_pumps: Tuple[Tuple[str, float, str], ...]) -> None:
+        """
+        Hand all nutrient doses to the batch dispense function in a single call.
+        
+        Args:
+            current_ec: Current EC reading
+            target_ec: Target EC value
+            nutrient_pumps: (pump_name, dosage, product_name) tuples
+        """
+        batch = [(pump_name, dosage, 1.0) for pump_name, dosage, _ in nutrient_pumps]
+        for pump_name, dosage, product_name in nutrient_pumps:
+            logger.info("Queueing %sml of %s from %s", dosage, product_name, pump_name)
+        
+        dispensed = len(nutrient_pumps)
+        try:
+            await self._call_hardware(self.dispense_pump_batch, batch)
+        except BatchDispenseError as e:
+            logger.error("Error dispensing nutrient batch after %d of %d doses: %s", e.dispensed, dispensed, e)
+            dispensed = e.dispensed
+        except Exception as e:
+            logger.error("Error dispensing nutrient batch: %s", e)
+            return
+        
+        # Record whatever was dispensed, including the doses before a failure
+        for pump_name, dosage, product_name in nutrient_pumps[:dispensed]:
+            self._log_dosing_action(pump_name, dosage, "EC adjustment",
+                                  current_value=current_ec, target_value=target_ec,
+                                  product_name=product_name)
+    
+    async def _adjust_ec_parallel(self, current_ec: float, target_ec: float,
+                                  nutrient_pumps: Tuple[Tuple[str, float, str], ...]) -> None:
+        """
+        Dispense all nutrient pumps concurrently, then wait once for mixing.
+        
+        Args:
+            current_ec: Current EC reading
+            target_ec: Target EC value
+            nutrient_pumps: (pump_name, dosage, product_name) tuples
+        """
+        logger.info("Dosing %d nutrients in parallel", len(nutrient_pumps))
+        results = await asyncio.gather(
+            *(self._dispense(pump_name, dosage) for pump_name, dosage, _ in nutrient_pumps),
+            return_exceptions=True
+        )
+        
+        for (pump_name, dosage, product_name), result in zip(nutrient_pumps, results):
+            if isinstance(result, Exception):
+                logger.error("Error dispensing %s from %s: %s", product_name, pump_name, result)
+                continue
+            self._log_dosing_action(pump_name, dosage, "EC adjustment",
+                                  current_value=current_ec, target_value=target_ec,
+                                  product_name=product_name)
+        
+        await self._wait(self.between_dose_delay)
+    
+    async def _dispense(self, pump_name: str, amount: float) -> None:
+        """Dispense from a pump without blocking the event loop."""
+        await self._call_hardware(self.dispense_pump, pump_name, amount, 1.0)  # 1.0 ml/s flow rate
+    
+    @staticmethod
+    async def _call_hardware(func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Call a sync or async hardware function without blocking the event loop.
+        
+        Coroutine functions are awaited directly; anything else runs in a
+        worker thread, and an awaitable it returns is awaited as well.
+        """
+        if inspect.iscoroutinefunction(func):
+            return await func(*args)
+        result = await asyncio.to_thread(func, *args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
     
     def _log_dosing_action(self, pump_name: str, amount: float, reason: str, 
                          current_value: float, target_value: float,
@@ -435,10 +964,9 @@ class AutoDosing:
             target_value: Target value we're aiming for
             product_name: Optional product name for nutrients
         """
-        timestamp = datetime.now().isoformat()
-        
         dosing_record = {
-            "timestamp": timestamp,
+            # Stored as integer nanoseconds; formatted on read/export
+            "timestamp": time.time_ns(),
             "pump": pump_name,
             "amount": amount,
             "reason": reason,
@@ -449,18 +977,21 @@ class AutoDosing:
         if product_name:
             dosing_record["product"] = product_name
             
+        # The bounded deque drops the oldest entry once full
         self.dosing_history.append(dosing_record)
-        
-        # Keep history to a reasonable size
-        if len(self.dosing_history) > 1000:
-            self.dosing_history = self.dosing_history[-1000:]
+        self.history_version += 1
+        self._dosing_seq.append(self.history_version)
             
         # Also log to the logger
-        logger.info(f"Dosed {amount}ml from {pump_name} for {reason}. " +
-                  f"Current: {current_value}, Target: {target_value}" +
-                  (f", Product: {product_name}" if product_name else ""))
+        if product_name:
+            logger.info("Dosed %sml from %s for %s. Current: %s, Target: %s, Product: %s",
+                        amount, pump_name, reason, current_value, target_value, product_name)
+        else:
+            logger.info("Dosed %sml from %s for %s. Current: %s, Target: %s",
+                        amount, pump_name, reason, current_value, target_value)
     
-    def _log_sensor_reading(self, ph: float, ec: float, temp: float) -> None:
+    def _log_sensor_reading(self, ph: float, ec: float, temp: float,
+                            timestamp: Optional[float] = None) -> None:
         """
         Log sensor readings to history.
         
@@ -468,73 +999,182 @@ class AutoDosing:
             ph: Current pH reading
             ec: Current EC reading
             temp: Current water temperature
+            timestamp: Optional epoch-seconds time the reading was taken;
+                defaults to now
         """
-        timestamp = datetime.now().isoformat()
+        if ph is None and ec is None and temp is None:
+            return
         
-        reading = {
-            "timestamp": timestamp,
-            "ph": ph,
-            "ec": ec,
-            "waterTemp": temp
-        }
+        # Timestamps are stored as integer nanoseconds; formatted on read/export
+        self.history_version += 1
+        self._sensor_seq.append(self.history_version)
+        self._sensor_ts.append(int(timestamp * 1_000_000_000) if timestamp is not None else time.time_ns())
+        self._sensor_ph.append(_NAN if ph is None else ph)
+        self._sensor_ec.append(_NAN if ec is None else ec)
+        self._sensor_temp.append(_NAN if temp is None else temp)
+        
+        # Trim in bulk once the arrays reach twice the history limit, keeping
+        # appends amortized O(1); readers only look at the newest entries
+        if len(self._sensor_ts) >= 2 * MAX_HISTORY_ENTRIES:
+            excess = len(self._sensor_ts) - MAX_HISTORY_ENTRIES
+            for column in (self._sensor_seq, self._sensor_ts, self._sensor_ph, self._sensor_ec, self._sensor_temp):
+                del column[:excess]
+        
+        # Update the moving averages used for dosing decisions
+        alpha = self.ema_alpha
+        if ph is not None:
+            self._ph_ema = ph if self._ph_ema is None else alpha * ph + (1 - alpha) * self._ph_ema
+        if ec is not None:
+            self._ec_ema = ec if self._ec_ema is None else alpha * ec + (1 - alpha) * self._ec_ema
+    
+    def set_config(self, **settings: Any) -> None:
+        """
+        Update timing settings at runtime.
         
-        self.sensor_history.append(reading)
+        The monitoring loop is woken to re-evaluate its next check time, so
+        changes take effect without restarting the task.
         
-        # Keep history to a reasonable size
-        if len(self.sensor_history) > 1000:
-            self.sensor_history = self.sensor_history[-1000:]
+        Args:
+            **settings: Any of check_interval, dosing_cooldown, between_dose_delay,
+                parallel_dosing
+        """
+        # Reject the whole update before applying any of it
+        for key in settings:
+            if key not in self._CONFIG_KEYS:
+                raise ValueError(f"Unknown auto dosing setting: {key}")
+        for key, value in settings.items():
+            setattr(self, key, value)
+        self._config_view = self._build_config_view()
+        self._wake.set()
+    
+    def _build_config_view(self) -> Dict[str, Any]:
+        """Build the config sub-dict reported by get_status()."""
+        return {key: getattr(self, key) for key in self._CONFIG_KEYS}
     
     def get_status(self) -> Dict[str, Any]:
         """Get the current status of the auto dosing system."""
+        since_dosing = time.monotonic() - self._last_dosing_mono
         return {
             "enabled": self.enabled,
             "running": self.running,
             "last_check_time": self.last_check_time,
             "last_dosing_time": self.last_dosing_time,
-            "in_cooldown": (time.time() - self.last_dosing_time) < self.dosing_cooldown,
-            "cooldown_remaining": max(0, self.dosing_cooldown - (time.time() - self.last_dosing_time)),
-            "config": {
-                "check_interval": self.check_interval,
-                "dosing_cooldown": self.dosing_cooldown,
-                "between_dose_delay": self.between_dose_delay
-            }
+            "in_cooldown": since_dosing < self.dosing_cooldown,
+            "cooldown_remaining": max(0, self.dosing_cooldown - since_dosing),
+            # Shared between calls; rebuilt by set_config() - treat as read-only
+            "config": self._config_view
         }
     
-    def get_history(self, limit: int = 50) -> Dict[str, List[Dict[str, Any]]]:
+    @property
+    def sensor_history(self) -> List[Dict[str, Any]]:
+        """Sensor readings as a list of dicts, materialized on demand."""
+        return self._sensor_records(MAX_HISTORY_ENTRIES)
+    
+    def _sensor_records(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Build dicts for the most recent sensor readings.
+        
+        Args:
+            limit: Maximum number of readings to return (capped at the history size)
+        
+        Returns:
+            List of reading dicts, oldest first, with raw nanosecond timestamps
+        """
+        end = len(self._sensor_ts)
+        return self._sensor_slice(max(0, end - min(limit, MAX_HISTORY_ENTRIES)), end)
+    
+    def _sensor_slice(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Build dicts for the sensor readings stored at positions [start, end)."""
+        return [
+            {"timestamp": ts, "ph": _nan_to_none(ph), "ec": _nan_to_none(ec), "waterTemp": _nan_to_none(temp)}
+            for ts, ph, ec, temp in zip(self._sensor_ts[start:end], self._sensor_ph[start:end],
+                                        self._sensor_ec[start:end], self._sensor_temp[start:end])
+        ]
+    
+    def get_history(self, limit: int = 50, since: Optional[int] = None) -> Dict[str, Any]:
         """
         Get the dosing and sensor history.
         
+        Without `since`, returns the latest `limit` entries of each list. With
+        `since`, returns the oldest `limit` entries recorded after that cursor,
+        so a poller that falls behind catches up over several calls instead of
+        skipping entries.
+        
         Args:
-            limit: Maximum number of history entries to return
+            limit: Maximum number of history entries to return per list
+            since: Only return entries recorded after this cursor from a previous call
             
         Returns:
-            Dictionary with dosing_history and sensor_history lists
+            Dictionary with dosing_history and sensor_history lists, and the
+            cursor to pass as `since` next time
         """
+        limit = max(0, limit)
+        cursor = self.history_version
+        sensor_end = len(self._sensor_seq)
+        # Entries beyond MAX_HISTORY_ENTRIES are only kept until the next bulk trim
+        sensor_floor = max(0, sensor_end - MAX_HISTORY_ENTRIES)
+        if since is None:
+            dosing_start = max(0, len(self._dosing_seq) - limit)
+            sensor_start = max(sensor_floor, sensor_end - limit)
+            dosing_end = len(self._dosing_seq)
+        else:
+            # Sequence numbers only grow, so both lists are sorted by them
+            dosing_start = bisect_right(self._dosing_seq, since)
+            sensor_start = max(sensor_floor, bisect_right(self._sensor_seq, since))
+            dosing_end = min(len(self._dosing_seq), dosing_start + limit)
+            sensor_end = min(sensor_end, sensor_start + limit)
+            # When a list is cut short, stop the cursor at its last returned entry
+            # and leave out newer entries of the other list, so the next call
+            # resumes there without gaps or duplicates
+            if dosing_end < len(self._dosing_seq):
+                cursor = self._dosing_seq[dosing_end - 1] if dosing_end > dosing_start else since
+            if sensor_end < len(self._sensor_seq):
+                cursor = min(cursor, self._sensor_seq[sensor_end - 1] if sensor_end > sensor_start else since)
+            dosing_end = bisect_right(self._dosing_seq, cursor, dosing_start, dosing_end)
+            sensor_end = bisect_right(self._sensor_seq, cursor, sensor_start, sensor_end)
+        
         return {
-            "dosing_history": self.dosing_history[-limit:] if self.dosing_history else [],
-            "sensor_history": self.sensor_history[-limit:] if self.sensor_history else []
+            "dosing_history": [_with_iso_timestamp(r) for r in islice(self.dosing_history, dosing_start, dosing_end)],
+            "sensor_history": [_with_iso_timestamp(r) for r in self._sensor_slice(sensor_start, sensor_end)],
+            "cursor": cursor
         }
     
-    def export_history_to_file(self, filename: str = "auto_dosing_history.json") -> None:
+    async def export_history_to_file(self, filename: str = "auto_dosing_history.json",
+                                     pretty: bool = False) -> None:
         """
         Export dosing and sensor history to a JSON file.
         
+        The history is snapshotted on the event loop and written from a worker
+        thread so serialization doesn't stall the monitoring loop.
+        
         Args:
             filename: Name of the file to save history to
+            pretty: Indent the output for human reading
         """
         history = {
-            "dosing_history": self.dosing_history,
-            "sensor_history": self.sensor_history,
+            "dosing_history": [_with_iso_timestamp(r) for r in self.dosing_history],
+            "sensor_history": [_with_iso_timestamp(r) for r in self.sensor_history],
             "exported_at": datetime.now().isoformat()
         }
         
-        with open(filename, 'w') as f:
-            json.dump(history, f, indent=2)
+        await asyncio.to_thread(self._write_history_file, filename, history, pretty)
             
-        logger.info(f"Exported dosing history to {filename}")
+        logger.info("Exported dosing history to %s", filename)
+    
+    @staticmethod
+    def _write_history_file(filename: str, history: Dict[str, Any], pretty: bool) -> None:
+        """Serialize a history snapshot to disk (runs in a worker thread)."""
+        data = _dumps(history, pretty)
+        # Write to a temporary file and rename so readers never see a partial export
+        tmp_filename = filename + ".tmp"
+        with open(tmp_filename, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_filename, filename)
 
 # Example of how to use this class in a main program:
 if __name__ == "__main__":
+    configure_logging()
+    
     # These would be replaced with actual functions from your system
     def mock_get_sensor_readings():
         """Mock function to get sensor readings"""
@@ -587,7 +1227,16 @@ if __name__ == "__main__":
         await auto_doser.stop()
         
         # Export history
-        auto_doser.export_history_to_file()
+        await auto_doser.export_history_to_file()
     
-    # Run the example
-    asyncio.run(main())
\ No newline at end of file
+    # Run the example; uvloop is optional and lowers event loop overhead when installed
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        if sys.version_info >= (3, 12):
+            asyncio.run(main(), loop_factory=uvloop.new_event_loop)
+        else:
+            uvloop.install()
+            asyncio.run(main())
\ No newline at end of file
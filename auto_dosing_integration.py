@@ -4,52 +4,150 @@ NuTetra Auto Dosing Integration Script
 Shows how to integrate the AutoDosing module with the main system.
 """
 import asyncio
+import ctypes
+import http.client
 import json
 import os
+import select
 import sys
 import signal
+import tempfile
+import threading
 import time
-from typing import Dict, Any
-import subprocess
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, Tuple
 import logging
 
+# Use orjson when available; its decode errors subclass json.JSONDecodeError
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj: Any, indent: bool = False) -> bytes:
+        if indent:
+            return json.dumps(obj, indent=2).encode()
+        return json.dumps(obj, separators=(',', ':')).encode()
+
 # Import the AutoDosing module
-from auto_dosing import AutoDosing
-
-# Set up logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("auto_dosing_integration.log"),
-        logging.StreamHandler()
-    ]
-)
+from auto_dosing import STOP_TIMEOUT, AutoDosing, BatchDispenseError, DosingState, configure_logging
+from auto_dosing_procs import iter_daemon_processes
+
 logger = logging.getLogger("auto_dosing_integration")
 
+
+def _configure_logging():
+    """
+    Set up logging for the daemon; file and console output are written from a background thread
+    
+    Not done at import, so processes that only query status or change settings
+    don't open the log file. Does nothing if logging is already configured.
+    Set LOG_LEVEL=DEBUG in the environment for detailed output.
+    """
+    configure_logging(
+        level=getattr(logging, os.environ.get("LOG_LEVEL", "INFO").upper(), logging.INFO),
+        logfile="auto_dosing_integration.log"
+    )
+
 # Configuration
-DATA_DIR = os.path.join(os.getcwd(), 'data')
+# The data directory lives next to this script, wherever it is launched from
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 CONFIG_FILE = os.path.join(DATA_DIR, 'auto_dosing_config.json')
+STATUS_FILE = os.path.join(DATA_DIR, 'auto_dosing_status.json')
 DEFAULT_CONFIG = {
     "enabled": False,
     "check_interval": 60,     # Check sensors every 60 seconds
     "dosing_cooldown": 300,   # Wait 5 minutes after dosing before checking again
-    "between_dose_delay": 30  # Wait 30 seconds between nutrient doses
+    "between_dose_delay": 30,  # Wait 30 seconds between nutrient doses
+    "parallel_dosing": False   # Dose nutrient pumps one at a time
 }
+# Read-only view handed to callers that only read the config
+_DEFAULTS = MappingProxyType(DEFAULT_CONFIG)
+
+# Readings reported when the sensor API can't be reached or parsed
+_SENSOR_FALLBACK: Mapping[str, float] = MappingProxyType({"ph": 7.0, "ec": 1.0, "waterTemp": 20.0})
+
+# NuTetra web API
+API_HOST = "localhost"
+API_PORT = 3000
 
 # Global auto doser instance
 auto_doser = None
 
+# Set once the data directory has been verified writable in this process
+_data_dir_ok = False
+
+# Set when the daemon should shut down; created by main()
+_shutdown: Optional[asyncio.Event] = None
+
+# In-flight enable/disable tasks, keyed by operation
+_control_tasks: Dict[str, asyncio.Task] = {}
+
+# Latest enabled state requested through update_auto_dosing_config() and the
+# task that brings the doser in line with it
+_desired_enabled: Optional[bool] = None
+_converge_task: Optional[asyncio.Task] = None
+_converge_lock = asyncio.Lock()
+
+# Status fields kept up to date by state transitions so status reads do no I/O
+_status_state: Dict[str, Any] = {"enabled": False, "initialized": False}
+
+# Keep-alive API connections, one per worker thread
+_http = threading.local()
+
+# Last parsed config, keyed by the file's (mtime_ns, size)
+_config_cache: Optional[Tuple[Tuple[int, int], Dict[str, Any]]] = None
 
-def ensure_data_dir():
-    """Ensure the data directory exists"""
+# Config updates arriving within this many seconds are written to disk once
+CONFIG_SAVE_DELAY = 0.5
+# Config waiting to be written by the debounced save, and the task that writes it
+_pending_config: Optional[Dict[str, Any]] = None
+_config_save_task: Optional[asyncio.Task] = None
+# Serialises config file writes, which may run in worker threads
+_config_write_lock = threading.Lock()
+
+# Seconds a /proc scan result is reused
+PEER_SCAN_TTL = 1.0
+# Seconds a signalled daemon gets to exit before SIGKILL: its stop() may wait
+# STOP_TIMEOUT for an in-flight dose, then the history export and config flush run
+PEER_EXIT_TIMEOUT = STOP_TIMEOUT + 3.0
+# Last scan result: (monotonic time, [(pid, cmdline), ...])
+_peer_cache: Optional[Tuple[float, List[Tuple[int, str]]]] = None
+
+# This process's PID, reported in the status file while running
+_PID = os.getpid()
+
+# Unchanged status is rewritten at most this often (seconds) to refresh its timestamp
+STATUS_REFRESH_INTERVAL = 60
+
+# Last status written by this process: ((enabled, running, pid), timestamp, (mtime_ns, size))
+_last_status: Optional[Tuple[Tuple[bool, bool, int], float, Tuple[int, int]]] = None
+
+
+def ensure_data_dir(force: bool = False):
+    """
+    Ensure the data directory exists
+    
+    The check runs once per process; pass force=True to verify again.
+    """
+    global _data_dir_ok
+    if _data_dir_ok and not force:
+        return
+    
     try:
         if not os.path.exists(DATA_DIR):
-            logger.info(f"Creating data directory at {DATA_DIR}")
+            logger.info("Creating data directory at %s", DATA_DIR)
             os.makedirs(DATA_DIR, exist_ok=True)
-            logger.info(f"Data directory created successfully")
+            logger.info("Data directory created successfully")
         else:
-            logger.debug(f"Data directory already exists at {DATA_DIR}")
+            logger.debug("Data directory already exists at %s", DATA_DIR)
         
         # Test write permissions by creating a test file
         test_file = os.path.join(DATA_DIR, '.test_write')
@@ -57,137 +155,289 @@ def ensure_data_dir():
             with open(test_file, 'w') as f:
                 f.write('test')
             os.remove(test_file)
-            logger.debug(f"Data directory is writable")
+            logger.debug("Data directory is writable")
+            _data_dir_ok = True
         except Exception as e:
-            logger.warning(f"Data directory exists but might not be writable: {e}")
+            logger.warning("Data directory exists but might not be writable: %s", e)
     except Exception as e:
-        logger.error(f"Failed to create or verify data directory: {e}")
+        logger.error("Failed to create or verify data directory: %s", e)
         # We'll continue and let individual operations handle their errors
 
 
-def load_config() -> Dict[str, Any]:
-    """Load auto dosing configuration"""
+def load_config(readonly: bool = False) -> Mapping[str, Any]:
+    """
+    Load auto dosing configuration, re-parsing the file only when it has changed
+    
+    Args:
+        readonly: Return a read-only view of the cached config instead of a copy
+            the caller may modify
+    """
+    global _config_cache
     ensure_data_dir()
     
-    if not os.path.exists(CONFIG_FILE):
+    # An update that hasn't been written yet is newer than the file
+    if _pending_config is not None:
+        return MappingProxyType(_pending_config) if readonly else _pending_config.copy()
+    
+    try:
+        st = os.stat(CONFIG_FILE)
+    except FileNotFoundError:
         # Create default config
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(DEFAULT_CONFIG, f, indent=2)
-        return DEFAULT_CONFIG.copy()
+        save_config(DEFAULT_CONFIG)
+        return _DEFAULTS if readonly else DEFAULT_CONFIG.copy()
+    
+    key = (st.st_mtime_ns, st.st_size)
+    if _config_cache is None or _config_cache[0] != key:
+        try:
+            with open(CONFIG_FILE, 'rb') as f:
+                _config_cache = (key, _json_loads(f.read()))
+        except Exception as e:
+            logger.error("Error loading config: %s", e)
+            return _DEFAULTS if readonly else DEFAULT_CONFIG.copy()
+    
+    config = _config_cache[1]
+    # Callers may modify the returned dict, so only share the cached one read-only
+    return MappingProxyType(config) if readonly else config.copy()
+
+
+def _atomic_write(path: str, data: bytes, fsync: bool = False) -> Tuple[int, int]:
+    """
+    Write a file through a temporary file swapped in with os.replace()
+    
+    Readers never see a partial file. Returns the new file's (mtime_ns, size).
     
+    Args:
+        path: File to write
+        data: New contents
+        fsync: Flush the data to disk before swapping it in, so a crash can't
+            leave an empty file either
+    """
+    # A unique temporary file: the daemon, the route.ts commands and the status
+    # checker may all write the same file at once
+    fd, tmp_file = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path))
     try:
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
-        return config
-    except Exception as e:
-        logger.error(f"Error loading config: {e}")
-        return DEFAULT_CONFIG.copy()
+        with open(fd, 'wb') as f:
+            # mkstemp creates the file owner-only; keep the usual permissions
+            os.fchmod(fd, 0o644)
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(fd)
+        os.replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+        raise
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _write_config_file(config: Mapping[str, Any]) -> Tuple[int, int]:
+    """Write the config file atomically and return its (mtime_ns, size)"""
+    with _config_write_lock:
+        return _atomic_write(CONFIG_FILE, _json_dumps(config, indent=True), fsync=True)
 
 
 def save_config(config: Dict[str, Any]):
-    """Save auto dosing configuration"""
+    """Save auto dosing configuration and prime the load_config() cache with it"""
+    global _config_cache, _pending_config
     ensure_data_dir()
+    _config_cache = None
+    # This write supersedes any debounced one
+    _pending_config = None
     
     try:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
+        _config_cache = (_write_config_file(config), config.copy())
         logger.info("Auto dosing configuration saved")
     except Exception as e:
-        logger.error(f"Error saving config: {e}")
+        logger.error("Error saving config: %s", e)
 
 
-def update_status_file(enabled: bool, running: bool, pid: int = 0):
-    """Update the auto dosing status file"""
+async def asave_config(config: Dict[str, Any]):
+    """
+    Save auto dosing configuration without blocking the event loop
+    
+    The config is served from memory while the write (and its fsync) runs in
+    a worker thread.
+    """
+    global _config_cache, _pending_config
     ensure_data_dir()
+    snapshot = config.copy()
+    _pending_config = snapshot
     
-    status_file = os.path.join(DATA_DIR, 'auto_dosing_status.json')
+    try:
+        key = await asyncio.to_thread(_write_config_file, snapshot)
+    except Exception as e:
+        logger.error("Error saving config: %s", e)
+        if _pending_config is snapshot:
+            _pending_config = None
+        _config_cache = None
+        return
+    
+    # An update made while writing stays pending for its own save
+    if _pending_config is snapshot:
+        _pending_config = None
+        _config_cache = (key, snapshot)
+    logger.info("Auto dosing configuration saved")
+
+
+def _save_config_later(config: Dict[str, Any]):
+    """
+    Save the config after CONFIG_SAVE_DELAY, coalescing updates made meanwhile
+    
+    Saves immediately when no event loop is running.
+    """
+    global _pending_config, _config_save_task
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        save_config(config)
+        return
     
+    _pending_config = config
+    if _config_save_task is None or _config_save_task.done():
+        _config_save_task = loop.create_task(_delayed_config_save())
+
+
+async def _delayed_config_save():
+    """Write the pending config once the debounce delay has passed"""
     try:
+        # An update made during a write stays pending; go round again for it,
+        # since _save_config_later() won't start a new task while this one runs
+        while _pending_config is not None:
+            await asyncio.sleep(CONFIG_SAVE_DELAY)
+            if _pending_config is not None:
+                await asave_config(_pending_config)
+    except asyncio.CancelledError:
+        # Cancelled at loop shutdown: write now so the update isn't lost
+        flush_config()
+        raise
+
+
+def flush_config():
+    """Write a debounced config update now, if one is pending"""
+    if _pending_config is not None:
+        save_config(_pending_config)
+
+
+def update_status_file(enabled: bool, running: bool, pid: int = 0):
+    """
+    Update the auto dosing status file
+    
+    Identical status is not rewritten unless the file was changed by someone
+    else or STATUS_REFRESH_INTERVAL has passed. Writes go through a temporary
+    file so readers never see a partial status.
+    """
+    global _last_status
+    ensure_data_dir()
+    
+    try:
+        now = time.time()
         status_data = {
             "enabled": enabled,
             "running": running,
-            "pid": pid or os.getpid() if running else 0,
-            "timestamp": time.time()
+            "pid": (pid or _PID) if running else 0,
+            "timestamp": now
         }
+        state = (status_data["enabled"], status_data["running"], status_data["pid"])
         
-        with open(status_file, 'w') as f:
-            json.dump(status_data, f, indent=2)
-            
-        logger.info(f"Updated status file: {status_data}")
+        if _last_status is not None:
+            last_state, last_written, last_file = _last_status
+            if last_state == state and now - last_written < STATUS_REFRESH_INTERVAL:
+                try:
+                    st = os.stat(STATUS_FILE)
+                    if (st.st_mtime_ns, st.st_size) == last_file:
+                        return True
+                except FileNotFoundError:
+                    pass
+        
+        _last_status = (state, now, _atomic_write(STATUS_FILE, _json_dumps(status_data)))
+        
+        logger.info("Updated status file: %s", status_data)
         return True
     except Exception as e:
-        logger.error(f"Error updating status file: {e}")
+        logger.error("Error updating status file: %s", e)
         return False
 
 
-def get_sensor_readings() -> Dict[str, float]:
+def _get_api_connection() -> http.client.HTTPConnection:
+    """Return this thread's API connection, replacing it if the server has closed it"""
+    conn = getattr(_http, "conn", None)
+    if conn is not None and conn.sock is not None:
+        # An idle keep-alive socket that is readable has been closed by the server
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+        if readable:
+            conn.close()
+    if conn is None:
+        conn = _http.conn = http.client.HTTPConnection(API_HOST, API_PORT)
+    return conn
+
+
+def _api_request(method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Send a request to the NuTetra API over a reused keep-alive connection
+    
+    Args:
+        method: HTTP method
+        path: Request path, e.g. '/api/sensors'
+        payload: Optional JSON body
+    
+    Returns:
+        The raw response body
+    """
+    body = _json_dumps(payload) if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    
+    # Only GETs are retried: repeating a POST could dispense twice
+    attempts = 2 if method == "GET" else 1
+    for attempt in range(1, attempts + 1):
+        conn = _get_api_connection()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            return conn.getresponse().read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            if attempt == attempts:
+                raise
+            logger.debug("Retrying %s %s on a fresh connection", method, path)
+
+
+def get_sensor_readings() -> Mapping[str, float]:
     """
     Get sensor readings from the Atlas Scientific sensors
-    Returns dict with ph, ec, and waterTemp keys
+    Returns dict with ph, ec, and waterTemp keys (read-only when the fallback values are used)
     """
     try:
         logger.debug("Calling sensor API endpoint...")
         # Call the sensors API directly
-        cmd = ["curl", "-v", "-s", "http://localhost:3000/api/sensors"]
-        logger.debug(f"Running command: {' '.join(cmd)}")
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False  # Don't raise exception on non-zero exit
-        )
-        
-        if result.returncode != 0:
-            logger.error(f"Curl command failed with return code {result.returncode}")
-            logger.error(f"Stderr: {result.stderr}")
-            # Fall back to using default values
-            return {
-                "ph": 7.0,
-                "ec": 1.0,
-                "waterTemp": 20.0
-            }
+        body = _api_request("GET", "/api/sensors")
         
         # Parse the JSON result
         try:
-            response = json.loads(result.stdout.strip())
-            logger.debug(f"API response: {response}")
+            response = _json_loads(body)
+            logger.debug("API response: %s", response)
             
-            # Check various response formats
-            if response.get("status") == "success" and response.get("data"):
-                # Standard format: { status: "success", data: {...} }
-                readings = response["data"]
-                logger.debug(f"Parsed sensor readings from data field: {readings}")
-                return readings
-            elif isinstance(response, dict) and all(k in response for k in ["ph", "ec", "waterTemp"]):
-                # Direct format: { ph: X, ec: Y, waterTemp: Z }
-                logger.debug(f"Parsed sensor readings from direct response: {response}")
-                return response
-            else:
-                logger.error(f"API error or unexpected format: {response.get('error', 'Unknown error')}")
+            # Standard format { status: "success", data: {...} } or direct { ph: X, ec: Y, waterTemp: Z }
+            try:
+                data = response["data"] if response.get("status") == "success" else response
+                return {"ph": data["ph"], "ec": data["ec"], "waterTemp": data.get("waterTemp")}
+            except (KeyError, TypeError, AttributeError):
+                error = response.get('error', 'Unknown error') if isinstance(response, dict) else response
+                logger.error("API error or unexpected format: %s", error)
                 # Fall back to using default values
-                return {
-                    "ph": 7.0,
-                    "ec": 1.0,
-                    "waterTemp": 20.0
-                }
+                return _SENSOR_FALLBACK
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {e}")
-            logger.error(f"Response was: {result.stdout}")
+            logger.error("Failed to parse JSON response: %s", e)
+            logger.error("Response was: %r", body)
             # Fall back to using default values
-            return {
-                "ph": 7.0,
-                "ec": 1.0,
-                "waterTemp": 20.0
-            }
+            return _SENSOR_FALLBACK
     except Exception as e:
-        logger.error(f"Error getting sensor readings: {e}")
+        logger.error("Error getting sensor readings: %s", e)
         # Return some fallback values
-        return {
-            "ph": 7.0,
-            "ec": 1.0,
-            "waterTemp": 20.0
-        }
+        return _SENSOR_FALLBACK
 
 
 def get_active_profile() -> Dict[str, Any]:
@@ -198,45 +448,37 @@ def get_active_profile() -> Dict[str, Any]:
     try:
         logger.debug("Calling profiles API endpoint...")
         # Call the profiles API to get the active profile
-        cmd = ["curl", "-v", "-s", "http://localhost:3000/api/profiles/active"]
-        logger.debug(f"Running command: {' '.join(cmd)}")
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False  # Don't raise exception on non-zero exit
-        )
-        
-        if result.returncode != 0:
-            logger.error(f"Curl command failed with return code {result.returncode}")
-            logger.error(f"Stderr: {result.stderr}")
-            return {}
+        body = _api_request("GET", "/api/profiles/active")
         
         # Parse the JSON result
         try:
-            response = json.loads(result.stdout.strip())
-            logger.debug(f"API response: {response}")
+            response = _json_loads(body)
+            logger.debug("API response: %s", response)
+            
+            if not isinstance(response, dict):
+                logger.warning("No active profile found, unexpected response: %s", response)
+                return {}
             
             # Check if this is a direct profile object (has name, targetPh, targetEc)
-            if isinstance(response, dict) and response.get("name") and response.get("targetPh") and response.get("targetEc"):
-                logger.debug(f"Found active profile directly in response: {response.get('name', 'Unknown')}")
+            if response.get("name") and response.get("targetPh") and response.get("targetEc"):
+                logger.debug("Found active profile directly in response: %s", response["name"])
                 return response
+            
             # Check standard API response format
-            elif response.get("status") == "success" and response.get("data"):
-                profile = response["data"]
-                logger.debug(f"Found active profile in data field: {profile.get('name', 'Unknown')}")
+            profile = response.get("data") if response.get("status") == "success" else None
+            if profile:
+                logger.debug("Found active profile in data field: %s", profile.get('name', 'Unknown'))
                 return profile
-            else:
-                logger.warning(f"No active profile found: {response.get('error', 'Unknown error')}")
-                logger.warning(f"Full response: {response}")
-                return {}
+            
+            logger.warning("No active profile found: %s", response.get('error', 'Unknown error'))
+            logger.warning("Full response: %s", response)
+            return {}
         except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {e}")
-            logger.error(f"Response was: {result.stdout}")
+            logger.error("Failed to parse JSON response: %s", e)
+            logger.error("Response was: %r", body)
             return {}
     except Exception as e:
-        logger.error(f"Error getting active profile: {e}")
+        logger.error("Error getting active profile: %s", e)
         return {}
 
 
@@ -250,7 +492,7 @@ def dispense_pump(pump_name: str, amount: float, flow_rate: float):
         flow_rate: Flow rate in ml/s
     """
     try:
-        logger.debug(f"Dispensing {amount}ml from {pump_name} at {flow_rate}ml/s")
+        logger.debug("Dispensing %sml from %s at %sml/s", amount, pump_name, flow_rate)
         # Call the pump API
         data = {
             "pump": pump_name,
@@ -258,55 +500,84 @@ def dispense_pump(pump_name: str, amount: float, flow_rate: float):
             "flowRate": flow_rate
         }
         
-        json_data = json.dumps(data)
-        logger.debug(f"Request data: {json_data}")
-        
-        cmd = [
-            "curl", "-v", "-s", "-X", "POST", 
-            "-H", "Content-Type: application/json", 
-            "-d", json_data, 
-            "http://localhost:3000/api/pumps/dispense"
-        ]
+        logger.debug("Request data: %s", data)
         
-        logger.debug(f"Running command: {' '.join(cmd)}")
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            check=False  # Don't raise exception on non-zero exit
-        )
-        
-        if result.returncode != 0:
-            logger.error(f"Curl command failed with return code {result.returncode}")
-            logger.error(f"Stderr: {result.stderr}")
-            raise Exception(f"Failed to dispense from pump {pump_name}: Command failed with code {result.returncode}")
+        try:
+            body = _api_request("POST", "/api/pumps/dispense", data)
+        except (http.client.HTTPException, OSError) as e:
+            raise Exception(f"Failed to dispense from pump {pump_name}: {e}")
         
         # Try to parse response for more detailed logging
         try:
-            response = json.loads(result.stdout.strip())
-            logger.debug(f"API response: {response}")
+            response = _json_loads(body)
+            logger.debug("API response: %s", response)
             
-            if response.get("status") != "success":
-                error_msg = response.get("error", "Unknown API error")
-                logger.error(f"API error: {error_msg}")
+            status = response.get("status") if isinstance(response, dict) else None
+            if status != "success":
+                error_msg = response.get("error", "Unknown API error") if isinstance(response, dict) else response
+                logger.error("API error: %s", error_msg)
                 raise Exception(f"Failed to dispense from pump {pump_name}: {error_msg}")
         except json.JSONDecodeError:
             # If we can't parse the response, just log what we got back
-            logger.debug(f"Response (not JSON): {result.stdout}")
+            logger.debug("Response (not JSON): %r", body)
         
-        logger.info(f"Successfully dispensed {amount}ml from {pump_name} at {flow_rate}ml/s")
+        logger.info("Successfully dispensed %sml from %s at %sml/s", amount, pump_name, flow_rate)
     except Exception as e:
-        logger.error(f"Error dispensing from pump {pump_name}: {e}")
+        logger.error("Error dispensing from pump %s: %s", pump_name, e)
         raise
 
 
-async def start_auto_dosing():
-    """Initialize and start the auto-dosing system"""
+def dispense_pumps_batch(doses: List[Tuple[str, float, float]]):
+    """
+    Dispense several doses back to back with a single API request
+    
+    Args:
+        doses: (pump name, amount in ml, flow rate in ml/s) tuples
+    
+    Raises:
+        BatchDispenseError: If the API reports a failure; carries how many doses were dispensed
+    """
+    data = {
+        "doses": [
+            {"pump": pump_name, "amount": amount, "flowRate": flow_rate}
+            for pump_name, amount, flow_rate in doses
+        ]
+    }
+    logger.debug("Batch request data: %s", data)
+    
+    try:
+        body = _api_request("POST", "/api/pumps/dispense_batch", data)
+    except (http.client.HTTPException, OSError) as e:
+        logger.error("Error dispensing batch of %s doses: %s", len(doses), e)
+        raise Exception(f"Failed to dispense batch: {e}")
+    
+    try:
+        response = _json_loads(body)
+    except json.JSONDecodeError:
+        response = None
+    logger.debug("API response: %s", response)
+    
+    if not isinstance(response, dict) or response.get("status") != "success":
+        error_msg = response.get("error", "Unknown API error") if isinstance(response, dict) else body
+        dispensed = response.get("dispensed", 0) if isinstance(response, dict) else 0
+        logger.error("Batch dispense failed after %s of %s doses: %s", dispensed, len(doses), error_msg)
+        raise BatchDispenseError(f"Failed to dispense batch: {error_msg}", dispensed)
+    
+    logger.info("Successfully dispensed batch of %s doses", len(doses))
+
+
+async def start_auto_dosing(config: Optional[Mapping[str, Any]] = None):
+    """
+    Initialize and start the auto-dosing system
+    
+    Args:
+        config: Already loaded configuration; read from disk when omitted
+    """
     global auto_doser
     
     # Load configuration
-    config = load_config()
+    if config is None:
+        config = load_config(readonly=True)
     
     # If we already have an auto_doser instance that's running, don't create a new one
     if auto_doser and auto_doser.running:
@@ -326,7 +597,7 @@ async def start_auto_dosing():
                 except (asyncio.TimeoutError, asyncio.CancelledError):
                     pass
         except Exception as e:
-            logger.error(f"Error cleaning up existing task: {e}")
+            logger.error("Error cleaning up existing task: %s", e)
         # Reset the instance to None so we create a fresh one
         auto_doser = None
     
@@ -338,8 +609,11 @@ async def start_auto_dosing():
         dispense_pump,
         check_interval=config.get('check_interval', 60),
         dosing_cooldown=config.get('dosing_cooldown', 300),
-        between_dose_delay=config.get('between_dose_delay', 30)
+        between_dose_delay=config.get('between_dose_delay', 30),
+        parallel_dosing=config.get('parallel_dosing', False),
+        dispense_pump_batch_func=dispense_pumps_batch
     )
+    _status_state.update(enabled=config.get('enabled', False), initialized=True)
     
     # Start auto dosing if enabled in config
     if config.get('enabled', False):
@@ -349,37 +623,91 @@ async def start_auto_dosing():
         logger.info("Auto dosing disabled in config, not starting automatically")
 
 
-def handle_signal(sig, frame):
+def _watch_task():
+    """Restart the monitoring task if it exits without being stopped"""
+    if auto_doser and auto_doser.task:
+        auto_doser.task.add_done_callback(_on_task_done)
+
+
+def _on_task_done(task: asyncio.Task):
+    """Supervisor callback for the monitoring task"""
+    if _shutdown is None or _shutdown.is_set():
+        return
+    # stop() moves the doser out of RUNNING first, so only unexpected exits get here
+    if auto_doser is None or auto_doser.task is not task or auto_doser.state is not DosingState.RUNNING:
+        return
+    if not load_config(readonly=True).get('enabled', False):
+        return
+    logger.warning("Auto-doser task exited while enabled, restarting...")
+    asyncio.get_running_loop().create_task(_restart_auto_dosing())
+
+
+async def _restart_auto_dosing():
+    """Restart the monitoring task and keep supervising it"""
+    await auto_doser.start()
+    _watch_task()
+
+
+def _request_shutdown(sig: int):
     """Signal handler for graceful shutdown"""
-    logger.info(f"Received signal {sig}, shutting down...")
-    if auto_doser and auto_doser.running:
-        # We can't use await in a signal handler, so we'll just set the flag
-        auto_doser.enabled = False
-        auto_doser.running = False
-    sys.exit(0)
+    logger.info("Received signal %s, shutting down...", signal.Signals(sig).name)
+    _shutdown.set()
+
+
+# prctl() option: signal to deliver when the parent process exits (Linux)
+_PR_SET_PDEATHSIG = 1
+
+
+def _exit_with_parent():
+    """
+    Ask the kernel to send SIGTERM to this process when its launcher exits
+    
+    Used when server.js starts the daemon, so a crashed or killed server can't
+    leave an orphaned daemon behind for the next start to collide with.
+    Only supported on Linux; elsewhere this logs a warning and does nothing.
+    """
+    parent = os.getppid()
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(_PR_SET_PDEATHSIG, signal.SIGTERM) != 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+    except (AttributeError, OSError) as e:
+        logger.warning("Cannot follow the parent process's lifetime: %s", e)
+        return
+    
+    # The launcher may already have exited before the request took effect
+    if os.getppid() != parent:
+        logger.info("Parent process already exited")
+        os.kill(os.getpid(), signal.SIGTERM)
 
 
 async def main():
     """Main function"""
-    # Setup signal handlers
-    signal.signal(signal.SIGINT, handle_signal)
-    signal.signal(signal.SIGTERM, handle_signal)
+    global _shutdown
+    _shutdown = asyncio.Event()
+    
+    # Setup signal handlers on the loop so shutdown runs the cleanup below
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, _request_shutdown, sig)
+    
+    if os.environ.get("AUTO_DOSING_EXIT_WITH_PARENT") == "1":
+        _exit_with_parent()
     
     # Create status file directory if it doesn't exist
     ensure_data_dir()
     
     # Create initial status file using our helper function
-    config = load_config() 
+    config = load_config(readonly=True)
     enabled_in_config = config.get('enabled', False)
     update_status_file(enabled=enabled_in_config, running=enabled_in_config)
     
     try:
         # Start auto dosing
-        await start_auto_dosing()
+        await start_auto_dosing(config)
         
         # Force enable if configured
-        config = load_config()
-        if config.get('enabled', False):
+        if enabled_in_config:
             logger.info("Auto-dosing enabled in config, force-starting...")
             if not auto_doser:
                 logger.error("ERROR: auto_doser not initialized properly!")
@@ -397,44 +725,202 @@ async def main():
                 else:
                     logger.info("Auto-doser already running")
         
-        # Keep the process running
-        while True:
-            await asyncio.sleep(10)  # Check status every 10 seconds
-            if auto_doser:
-                status = auto_doser.get_status()
-                logger.debug(f"Auto-doser status check: enabled={status['enabled']}, running={status['running']}")
-                
-                # Check if the task is still alive or if it's completed
-                task_active = auto_doser.task and not auto_doser.task.done() and not auto_doser.task.cancelled()
-                logger.debug(f"Task active check: {task_active}")
-                
-                # If enabled but not running or task is completed, try to restart
-                if status['enabled'] and (not status['running'] or not task_active):
-                    logger.warning("Auto-doser enabled but not running or task completed, attempting restart...")
-                    # Reset running flag to avoid "already running" warning
-                    auto_doser.running = False
-                    await auto_doser.start()
-            else:
-                logger.error("auto_doser instance is None! Reinitializing...")
-                await start_auto_dosing()
-            
+        # Restart the task only when it actually exits, then idle until shutdown
+        _watch_task()
+        await _shutdown.wait()
+        logger.info("Shutting down...")
+        
     except asyncio.CancelledError:
         logger.info("Main task cancelled")
     except Exception as e:
-        logger.error(f"Error in main: {e}", exc_info=True)
+        logger.error("Error in main: %s", e, exc_info=True)
     finally:
         # Clean up
-        if auto_doser and auto_doser.running:
-            logger.info("Stopping auto dosing...")
-            await auto_doser.stop()
+        flush_config()
+        if auto_doser:
+            if auto_doser.running:
+                logger.info("Stopping auto dosing...")
+                await auto_doser.stop()
             
-            # Export history before exit
-            auto_doser.export_history_to_file()
+            # Export history before exit, including a doser disabled earlier
+            await auto_doser.export_history_to_file()
+
+
+def _find_peer_processes() -> List[Tuple[int, str]]:
+    """
+    Find running auto dosing daemons by scanning /proc (Linux)
+    
+    Results are cached for PEER_SCAN_TTL seconds so back-to-back checks share one scan.
+    
+    Returns:
+        List of (pid, command line) tuples
+    """
+    global _peer_cache
+    now = time.monotonic()
+    if _peer_cache is not None and now - _peer_cache[0] < PEER_SCAN_TTL:
+        return _peer_cache[1]
+    
+    peers = list(iter_daemon_processes())
+    _peer_cache = (now, peers)
+    return peers
+
+
+def _open_pidfd(pid: int) -> Optional[int]:
+    """
+    Open a pidfd for a process, or return None where pidfds are unavailable
+    
+    A pidfd keeps referring to the same process even if its PID is reused,
+    and becomes readable when the process exits.
+    
+    Raises:
+        ProcessLookupError: The process has already exited
+    """
+    try:
+        return os.pidfd_open(pid)
+    except ProcessLookupError:
+        raise
+    except (AttributeError, OSError):
+        return None
+
+
+def _send_signal(pid: int, pidfd: Optional[int], sig: int) -> None:
+    """Send a signal through the process's pidfd, or by PID without one"""
+    if pidfd is None:
+        os.kill(pid, sig)
+    else:
+        signal.pidfd_send_signal(pidfd, sig)
+
+
+async def _wait_for_exit(pid: int, pidfd: Optional[int]) -> None:
+    """Return once the process has exited"""
+    if pidfd is None:
+        # No pidfd: poll whether the PID still exists
+        while True:
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return
+            except OSError:
+                # Still exists but owned by another user
+                pass
+            await asyncio.sleep(0.1)
+    
+    # A pidfd becomes readable when its process exits
+    loop = asyncio.get_running_loop()
+    exited = loop.create_future()
+    loop.add_reader(pidfd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(pidfd)
+
+
+async def _wait_for_peers(signalled: Dict[int, Optional[int]], timeout: float) -> List[int]:
+    """
+    Wait for all signalled processes at once, waking as each one exits
+    
+    Returns:
+        PIDs still running after the timeout
+    """
+    waiters = {pid: asyncio.ensure_future(_wait_for_exit(pid, pidfd)) for pid, pidfd in signalled.items()}
+    _, pending = await asyncio.wait(waiters.values(), timeout=timeout)
+    for waiter in pending:
+        waiter.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return [pid for pid, waiter in waiters.items() if waiter in pending]
+
+
+async def _signal_peers(sig: int, timeout: float = PEER_EXIT_TIMEOUT, escalate: bool = False) -> None:
+    """
+    Signal every other auto dosing daemon and wait briefly for them to exit
+    
+    Args:
+        sig: Signal to send, e.g. signal.SIGTERM
+        timeout: Maximum time in seconds to wait for the processes to exit
+        escalate: Send SIGKILL to processes still running after the timeout
+            and wait for them again
+    """
+    global _peer_cache
+    current_pid = os.getpid()
+    logger.info("Current process PID: %s", current_pid)
+    
+    signalled: Dict[int, Optional[int]] = {}
+    try:
+        for pid, _ in _find_peer_processes():
+            if pid == current_pid:
+                continue
+            logger.info("Terminating other auto-dosing process: %s", pid)
+            pidfd = None
+            try:
+                pidfd = _open_pidfd(pid)
+                _send_signal(pid, pidfd, sig)
+                signalled[pid] = pidfd
+            except ProcessLookupError:
+                pass
+            except OSError as kill_error:
+                logger.error("Error terminating process %s: %s", pid, kill_error)
+            if pidfd is not None and pid not in signalled:
+                os.close(pidfd)
+        
+        if not signalled:
+            return
+        
+        remaining = await _wait_for_peers(signalled, timeout)
+        if remaining and escalate and sig != signal.SIGKILL:
+            logger.warning("Auto-dosing processes did not exit after %s, killing: %s",
+                           signal.Signals(sig).name, remaining)
+            for pid in remaining:
+                try:
+                    _send_signal(pid, signalled[pid], signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                except OSError as kill_error:
+                    logger.error("Error killing process %s: %s", pid, kill_error)
+            remaining = await _wait_for_peers({pid: signalled[pid] for pid in remaining}, timeout)
+        
+        if remaining:
+            logger.warning("Auto-dosing processes still running after signal: %s", remaining)
+    finally:
+        for pidfd in signalled.values():
+            if pidfd is not None:
+                os.close(pidfd)
+        # The next scan should not see the processes that just exited
+        _peer_cache = None
 
 
 # API-like functions for external control
 
+async def _run_coalesced(name: str, operation) -> Any:
+    """
+    Run a control operation, sharing an in-flight run with concurrent callers
+    
+    Args:
+        name: Key identifying the operation
+        operation: Coroutine function to start when none is in flight
+    
+    Returns:
+        The operation's result
+    """
+    task = _control_tasks.get(name)
+    if task is None or task.done():
+        task = _control_tasks[name] = asyncio.create_task(operation())
+    else:
+        logger.debug("%s already in progress, waiting for it", name)
+    # A cancelled caller must not cancel the run other callers are waiting on
+    return await asyncio.shield(task)
+
+
 async def enable_auto_dosing():
+    """Enable auto dosing"""
+    return await _run_coalesced("enable", _enable_auto_dosing)
+
+
+async def disable_auto_dosing():
+    """Disable auto dosing"""
+    return await _run_coalesced("disable", _disable_auto_dosing)
+
+
+async def _enable_auto_dosing():
     """Enable auto dosing"""
     global auto_doser
     
@@ -445,32 +931,17 @@ async def enable_auto_dosing():
     
     # First, update the config file to make sure it's marked as enabled
     config = load_config()
-    config['enabled'] = True
-    save_config(config)
+    if not config.get('enabled', False):
+        config['enabled'] = True
+        await asave_config(config)
+    _status_state["enabled"] = True
     logger.info("Auto dosing enabled in configuration")
     
     # Force cleanup other processes
     try:
-        import subprocess
-        current_pid = os.getpid()
-        logger.info(f"Current process PID: {current_pid}")
-        
-        # Find any other auto-dosing processes and terminate them
-        result = subprocess.run(["pgrep", "-f", "python.*auto_dosing_integration.py"], 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            pids = [pid.strip() for pid in result.stdout.strip().split('\n') if pid.strip()]
-            for pid in pids:
-                if int(pid) != current_pid:
-                    logger.info(f"Terminating other auto-dosing process: {pid}")
-                    try:
-                        subprocess.run(["kill", "-9", pid], check=False)
-                        # Wait a bit to ensure process is terminated
-                        await asyncio.sleep(0.5)
-                    except Exception as kill_error:
-                        logger.error(f"Error terminating process {pid}: {kill_error}")
+        await _signal_peers(signal.SIGTERM, escalate=True)
     except Exception as proc_error:
-        logger.error(f"Error managing processes: {proc_error}")
+        logger.error("Error managing processes: %s", proc_error)
     
     # Ensure we have an auto_doser instance
     if not auto_doser:
@@ -495,11 +966,6 @@ async def enable_auto_dosing():
     else:
         logger.info("Auto dosing already running")
     
-    # Update config to persist enabled state
-    config = load_config()
-    config['enabled'] = True
-    save_config(config)
-    
     # Update the status file to reflect enabled state
     update_status_file(enabled=True, running=True)
     
@@ -509,7 +975,7 @@ async def enable_auto_dosing():
     return {"success": True, "message": "Auto dosing enabled"}
 
 
-async def disable_auto_dosing():
+async def _disable_auto_dosing():
     """Disable auto dosing"""
     global auto_doser
     
@@ -521,8 +987,10 @@ async def disable_auto_dosing():
         
         # Update the config to prevent auto-restart
         config = load_config()
-        config['enabled'] = False
-        save_config(config)
+        if config.get('enabled', False):
+            config['enabled'] = False
+            await asave_config(config)
+        _status_state["enabled"] = False
         logger.info("Auto dosing disabled in configuration")
         
         # Update status file immediately to reflect disabled state
@@ -530,24 +998,9 @@ async def disable_auto_dosing():
         
         # Force kill any existing auto-dosing processes except the current one
         try:
-            current_pid = os.getpid()
-            logger.info(f"Current process PID: {current_pid}")
-            
-            # Find all auto-dosing processes
-            result = subprocess.run(["pgrep", "-f", "python.*auto_dosing_integration.py"], 
-                                  capture_output=True, text=True)
-            if result.returncode == 0:
-                pids = [int(pid.strip()) for pid in result.stdout.strip().split('\n') if pid.strip()]
-                for pid in pids:
-                    if pid != current_pid:  # Don't kill ourselves
-                        logger.info(f"Attempting to terminate external auto-dosing process: {pid}")
-                        try:
-                            subprocess.run(["kill", str(pid)], check=False)
-                        except Exception as kill_error:
-                            logger.error(f"Error terminating process {pid}: {kill_error}")
-                            # Continue execution - don't let process killing issues stop the disabling
+            await _signal_peers(signal.SIGTERM, escalate=True)
         except Exception as proc_error:
-            logger.error(f"Error managing processes: {proc_error}")
+            logger.error("Error managing processes: %s", proc_error)
             # Continue execution - don't let process management issues stop the disabling
         
         # Then stop the running process if it exists
@@ -570,7 +1023,7 @@ async def disable_auto_dosing():
         # Return success response
         return {"success": True, "message": "Auto dosing disabled"}
     except Exception as e:
-        logger.error(f"Fatal error disabling auto dosing: {e}")
+        logger.error("Fatal error disabling auto dosing: %s", e)
         # Re-raise with a clearer message that will help in debugging
         raise Exception(f"Failed to disable auto dosing: {str(e)}")
 
@@ -579,78 +1032,19 @@ def get_auto_dosing_status():
     """Get current auto dosing status"""
     global auto_doser
     
-    # Add diagnostics to detect running processes
-    import subprocess
-    import os
-    try:
-        # Find all Python processes running auto_dosing_integration.py
-        result = subprocess.run(["pgrep", "-f", "python.*auto_dosing_integration.py"], capture_output=True, text=True)
-        pids = result.stdout.strip().split("\n") if result.stdout.strip() else []
-        current_pid = os.getpid()
-        logger.info(f"Auto-dosing processes: PIDs={pids}, Current PID={current_pid}")
-        
-        # Check status file for externally managed state
-        status_file = os.path.join(DATA_DIR, 'auto_dosing_status.json')
-        if os.path.exists(status_file):
-            try:
-                with open(status_file, 'r') as f:
-                    status_data = json.load(f)
-                    logger.info(f"Found status file: {status_data}")
-                    # If we find a valid status file with a PID that's running, we'll use that state
-                    if status_data.get('pid') and str(status_data.get('pid')) in pids:
-                        logger.info(f"Process with PID={status_data.get('pid')} is running")
-            except Exception as e:
-                logger.error(f"Error reading status file: {e}")
-    except Exception as e:
-        logger.error(f"Error checking processes: {e}")
-    
     logger.debug("Getting auto dosing status")
     
     # Check if auto_doser exists
     if not auto_doser:
         # Try to read from config
-        config = load_config()
+        config = load_config(readonly=True)
         enabled = config.get('enabled', False)
+        logger.debug("No auto_doser instance, using config: enabled=%s", enabled)
         
-        logger.debug(f"No auto_doser instance, using config: enabled={enabled}")
-        
-        # Check for external process running
-        import subprocess
-        import os
-        
-        status_file = os.path.join(DATA_DIR, 'auto_dosing_status.json')
-        external_running = False
-        
-        # Check if there's a process running the auto_dosing_integration.py script
-        try:
-            result = subprocess.run(["pgrep", "-fa", "python.*auto_dosing_integration.py"], capture_output=True, text=True)
-            processes = result.stdout.strip()
-            if processes:
-                logger.info(f"Found external auto_dosing processes: {processes}")
-                external_running = True
-        except Exception as e:
-            logger.error(f"Error checking for external processes: {e}")
-        
-        # Check status file as backup method
-        try:
-            if os.path.exists(status_file):
-                with open(status_file, 'r') as f:
-                    status_data = json.load(f)
-                    if status_data.get('running') and status_data.get('pid'):
-                        # Verify PID is still running
-                        try:
-                            os.kill(status_data.get('pid'), 0)  # Check if process exists
-                            external_running = True
-                            logger.info(f"Found running process from status file: PID={status_data.get('pid')}")
-                        except OSError:
-                            logger.info(f"Process in status file (PID={status_data.get('pid')}) is not running")
-        except Exception as e:
-            logger.error(f"Error checking status file: {e}")
-        
-        # Return status with running flag set if external process detected
-        return {
+        # The daemon runs in another process; report it as running
+        status = {
             "enabled": enabled,
-            "running": True,  # Set to True since we've detected a running process
+            "running": True,
             "initialized": True,  # Set initialized to match running
             "last_check_time": 0,
             "last_dosing_time": 0,
@@ -659,135 +1053,128 @@ def get_auto_dosing_status():
             "config": {
                 "check_interval": config.get('check_interval', 60),
                 "dosing_cooldown": config.get('dosing_cooldown', 300),
-                "between_dose_delay": config.get('between_dose_delay', 30)
+                "between_dose_delay": config.get('between_dose_delay', 30),
+                "parallel_dosing": config.get('parallel_dosing', False)
             }
         }
+        return status
     
-    # Read configuration state regardless of auto_doser
-    config = load_config()
-    config_enabled = config.get('enabled', False)
-    
-    # Get status from auto_doser instance
+    # In-process snapshot: running comes from the task itself, enabled from the
+    # last enable/disable/config transition; no files or processes are touched
     status = auto_doser.get_status()
+    status.update(_status_state)
     
-    # The auto_doser.enabled flag might not match the config file
-    # Config file takes precedence for the UI display
-    status["enabled"] = config_enabled
-    status["initialized"] = True
-    
-    # Force running to match task state
-    if auto_doser.task and not auto_doser.task.done() and not auto_doser.task.cancelled():
-        status["running"] = True
-        logger.debug("Auto-dosing task is active (running=True)")
-    else:
-        logger.debug(f"Auto-dosing task state: {auto_doser.task}")
-        # If the task is done but enabled is still true, we should restart it
-        if config_enabled and (not auto_doser.task or auto_doser.task.done() or auto_doser.task.cancelled()):
-            logger.info("Auto-dosing task is not running but should be - restarting it")
-            # Set running to false so we don't get a warning about already running
-            auto_doser.running = False
-            # Create a new task to start the auto dosing
-            asyncio.create_task(auto_doser.start())
-    
-    # Save status to file for external processes to read using our helper function
-    update_status_file(enabled=status["enabled"], running=True)
-    
-    # Ensure config is always included
-    if "config" not in status:
-        status["config"] = {
-            "check_interval": auto_doser.check_interval,
-            "dosing_cooldown": auto_doser.dosing_cooldown,
-            "between_dose_delay": auto_doser.between_dose_delay
-        }
-    
-    logger.debug(f"Auto dosing status: {status}")
+    logger.debug("Auto dosing status: %s", status)
     return status
 
 
-def get_auto_dosing_history(limit=50):
-    """Get auto dosing history"""
+def get_auto_dosing_history(limit=50, since=None):
+    """
+    Get auto dosing history
+    
+    The result includes a "cursor" string; passing it back as `since` returns
+    the entries recorded after the last one returned, so pollers don't re-fetch
+    the whole window or miss entries when more than `limit` arrive between polls.
+    
+    Args:
+        limit: Maximum number of entries per list
+        since: Cursor from a previous call, or None for the latest entries
+    """
     global auto_doser
     
+    since = int(since) if since not in (None, "") else None
+    
     if not auto_doser:
         return {
             "dosing_history": [],
-            "sensor_history": []
+            "sensor_history": [],
+            "cursor": str(since or 0)
         }
     
-    return auto_doser.get_history(limit)
+    history = auto_doser.get_history(limit, since)
+    # A string, since the clock-seeded cursor doesn't fit in a JavaScript number
+    history["cursor"] = str(history["cursor"])
+    return history
+
+
+async def _converge_enabled():
+    """Enable or disable auto dosing to match the most recently requested state"""
+    async with _converge_lock:
+        while True:
+            desired = _desired_enabled
+            if auto_doser is None or desired is None:
+                return
+            if desired and not auto_doser.running:
+                await enable_auto_dosing()
+            elif not desired and auto_doser.running:
+                await disable_auto_dosing()
+            # Requests made while switching are applied in another pass
+            if _desired_enabled == desired:
+                return
 
 
 def update_auto_dosing_config(new_config):
     """Update auto dosing configuration"""
-    global auto_doser
+    global auto_doser, _desired_enabled, _converge_task
     
     # Validate the config
-    valid_keys = ['check_interval', 'dosing_cooldown', 'between_dose_delay', 'enabled']
+    valid_keys = ['check_interval', 'dosing_cooldown', 'between_dose_delay', 'parallel_dosing', 'enabled']
     
     # Load current config
-    config = load_config()
+    current = load_config(readonly=True)
+    config = dict(current)
     
     # Update only valid keys
     for key, value in new_config.items():
         if key in valid_keys:
             config[key] = value
     
-    # Save the updated config
-    save_config(config)
+    # Nothing to write or apply if the update doesn't change anything
+    if config == current:
+        logger.debug("Auto dosing configuration unchanged")
+        return config
     
-    # Keep track of whether we need to restart the doser
-    restart_needed = False
-    was_running = False
+    # Save the updated config; bursts of updates are written once
+    _save_config_later(config)
+    _status_state["enabled"] = config.get('enabled', False)
     
     # Update auto doser if it exists
     if auto_doser:
-        logger.info(f"Updating auto doser configuration: check_interval={config.get('check_interval', 60)}, "
-                  f"dosing_cooldown={config.get('dosing_cooldown', 300)}, "
-                  f"between_dose_delay={config.get('between_dose_delay', 30)}")
-        
-        # Check if it was running
-        was_running = auto_doser.running
-        
-        # Update the runtime values
-        auto_doser.check_interval = config.get('check_interval', 60)
-        auto_doser.dosing_cooldown = config.get('dosing_cooldown', 300)
-        auto_doser.between_dose_delay = config.get('between_dose_delay', 30)
-        
-        # Force a restart if major time-based settings have changed
-        # This ensures the monitoring loop uses the new values immediately
-        if 'check_interval' in new_config or 'dosing_cooldown' in new_config:
-            restart_needed = True
-    
-    # Create a restart task if needed and it was already running
-    if restart_needed and was_running and auto_doser:
-        logger.info("Configuration changes require restart - restarting auto dosing process")
-        # Create a task to stop and then start the auto_doser
-        async def restart_auto_doser():
-            try:
-                # Stop it first
-                await auto_doser.stop()
-                logger.info("Auto dosing stopped for restart")
-                # Brief pause
-                await asyncio.sleep(1)
-                # Start it again
-                await auto_doser.start()
-                logger.info("Auto dosing restarted with new configuration")
-            except Exception as e:
-                logger.error(f"Error restarting auto dosing: {e}")
+        logger.info("Updating auto doser configuration: check_interval=%s, dosing_cooldown=%s, between_dose_delay=%s",
+                    config.get('check_interval', 60), config.get('dosing_cooldown', 300),
+                    config.get('between_dose_delay', 30))
         
-        # Create the restart task
-        asyncio.create_task(restart_auto_doser())
-    else:
-        # Standard enable/disable logic if no restart needed
-        if config.get('enabled', False) and auto_doser and not auto_doser.running:
-            asyncio.create_task(enable_auto_dosing())
-        elif not config.get('enabled', True) and auto_doser and auto_doser.running:
-            asyncio.create_task(disable_auto_dosing())
+        # Update the runtime values; set_config() wakes the monitoring loop so the
+        # new interval and cooldown apply without restarting the task
+        auto_doser.set_config(
+            check_interval=config.get('check_interval', 60),
+            dosing_cooldown=config.get('dosing_cooldown', 300),
+            between_dose_delay=config.get('between_dose_delay', 30),
+            parallel_dosing=config.get('parallel_dosing', False)
+        )
+    
+    # Apply enable/disable changes to this process; rapid updates converge on the last one
+    if auto_doser:
+        _desired_enabled = config.get('enabled', False)
+        if _converge_task is None or _converge_task.done():
+            _converge_task = asyncio.create_task(_converge_enabled())
     
-    logger.info(f"Auto dosing configuration updated: {config}")
+    logger.info("Auto dosing configuration updated: %s", config)
     return config
 
 
 # Run the script
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    _configure_logging()
+    
+    # uvloop is optional; fall back to the default event loop without it
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        if sys.version_info >= (3, 12):
+            asyncio.run(main(), loop_factory=uvloop.new_event_loop)
+        else:
+            uvloop.install()
+            asyncio.run(main()) 
\ No newline at end of file
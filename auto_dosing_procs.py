@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Locate running auto dosing daemons.
+
+Shared by auto_dosing_integration.py and check_and_update_status.py; it only
+uses the standard library so the status check stays cheap to start.
+"""
+import os
+import re
+from typing import Iterator, Tuple
+
+# Command lines of auto dosing daemons (same pattern as the pgrep/pkill calls)
+PROCESS_PATTERN = "python.*auto_dosing_integration.py"
+_PROCESS_CMDLINE = re.compile(PROCESS_PATTERN.encode())
+_SCRIPT_NAME = b"auto_dosing_integration.py"
+
+# Bytes of each /proc/<pid>/cmdline examined by the scan
+CMDLINE_READ_SIZE = 4096
+
+
+def iter_daemon_processes() -> Iterator[Tuple[int, str]]:
+    """
+    Yield (pid, command line) for each auto dosing daemon, scanning /proc (Linux)
+
+    Stop iterating early when only the first match is needed.
+    """
+    # One buffer for every cmdline read; the interpreter and script path come first
+    buf = bytearray(CMDLINE_READ_SIZE)
+    view = memoryview(buf)
+    for entry in os.scandir('/proc'):
+        if not entry.name.isdigit():
+            continue
+        try:
+            fd = os.open(f'/proc/{entry.name}/cmdline', os.O_RDONLY)
+            try:
+                n = os.readv(fd, [buf])
+            finally:
+                os.close(fd)
+        except OSError:
+            # Process exited or is not readable
+            continue
+        # Cheap substring test first; the regex only runs on likely matches
+        if buf.find(_SCRIPT_NAME, 0, n) != -1 and _PROCESS_CMDLINE.search(view[:n]):
+            cmdline = bytes(view[:n]).replace(b'\0', b' ').strip()
+            yield int(entry.name), cmdline.decode(errors='replace')
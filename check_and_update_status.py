@@ -1,62 +1,94 @@
 #!/usr/bin/env python3
 """
 Utility script to check and update auto-dosing status
+
+Run without arguments for a single check, or with --watch to stay resident
+and update the status file whenever the daemon starts or stops.
 """
+import argparse
 import os
 import json
+import signal
 import time
 import subprocess
 import sys
+import tempfile
+
+from auto_dosing_procs import PROCESS_PATTERN, iter_daemon_processes
+
+# Use orjson when available; the status file is machine-read, so it is written compactly
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
 
 # Configuration
-DATA_DIR = os.path.join(os.getcwd(), 'data')
+# Same data directory as auto_dosing_integration.py, which lives alongside this script
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 STATUS_FILE = os.path.join(DATA_DIR, 'auto_dosing_status.json')
 
-# Create data directory if it doesn't exist
-os.makedirs(DATA_DIR, exist_ok=True)
+# Largest fraction of time --watch spends scanning for a daemon that isn't running
+SCAN_DUTY_CYCLE = 0.01
 
-# Check for running auto-dosing processes
-try:
-    result = subprocess.run(["pgrep", "-fa", "python.*auto_dosing_integration.py"], 
-                           capture_output=True, text=True)
-    processes = result.stdout.strip()
-    
-    running = len(processes) > 0
-    print(f"Found auto-dosing processes: {processes}")
-    print(f"Auto-dosing is {'running' if running else 'not running'}")
+
+def find_auto_dosing_process():
+    """
+    Return "<pid> <command line>" of the first running auto-dosing process, or ""
     
-    # Get current time
-    current_time = time.time()
+    Scans /proc directly on Linux and falls back to pgrep elsewhere.
+    """
+    if not os.path.isdir('/proc'):
+        result = subprocess.run(["pgrep", "-fa", PROCESS_PATTERN], capture_output=True, text=True)
+        return result.stdout.strip()
     
-    # Update status file
-    if os.path.exists(STATUS_FILE):
+    for pid, cmdline in iter_daemon_processes():
+        return f"{pid} {cmdline}"
+    return ""
+
+
+def write_status(status_data):
+    """Replace the status file atomically so readers never see a partial write"""
+    # A unique temporary file, since the daemon writes the status file too
+    fd, tmp_file = tempfile.mkstemp(prefix=os.path.basename(STATUS_FILE) + ".", suffix=".tmp", dir=DATA_DIR)
+    try:
+        try:
+            os.fchmod(fd, 0o644)
+            os.write(fd, _json_dumps(status_data))
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_file, STATUS_FILE)
+    except BaseException:
         try:
-            with open(STATUS_FILE, 'r') as f:
-                status_data = json.load(f)
-                print(f"Current status file: {status_data}")
-                
-                # Update the running status
-                status_data['running'] = running
-                status_data['timestamp'] = current_time
-                
-                # Make sure we have both timestamps
-                if 'last_check_time' not in status_data:
-                    status_data['last_check_time'] = current_time
-                else:
-                    # Update last_check_time when running
-                    if running:
-                        status_data['last_check_time'] = current_time
-                
-                # Preserve last_dosing_time if it exists, otherwise initialize it
-                if 'last_dosing_time' not in status_data:
-                    status_data['last_dosing_time'] = status_data.get('timestamp', current_time)
-                
-                with open(STATUS_FILE, 'w') as f:
-                    json.dump(status_data, f, indent=2)
-                    print(f"Updated status file: {status_data}")
-        except Exception as e:
-            print(f"Error updating status file: {e}")
-    else:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
+        raise
+
+
+def update_status(running, current_time):
+    """
+    Record whether auto-dosing is running in the status file
+    
+    Args:
+        running: Whether an auto-dosing process was found
+        current_time: Timestamp to record for this check
+    """
+    # Update status file; a missing file is detected by the open itself
+    try:
+        with open(STATUS_FILE, 'rb') as f:
+            status_data = _json_loads(f.read())
+    except FileNotFoundError:
         print(f"Status file not found at: {STATUS_FILE}")
         # Create a new status file
         status_data = {
@@ -67,12 +99,123 @@ try:
             "last_check_time": current_time,
             "last_dosing_time": current_time
         }
-        with open(STATUS_FILE, 'w') as f:
-            json.dump(status_data, f, indent=2)
-            print(f"Created new status file: {status_data}")
-            
-except Exception as e:
-    print(f"Error checking processes: {e}")
-    sys.exit(1)
-
-sys.exit(0)
+        write_status(status_data)
+        print(f"Created new status file: {status_data}")
+        return
+    except Exception as e:
+        print(f"Error updating status file: {e}")
+        return
+    
+    try:
+        print(f"Current status file: {status_data}")
+        
+        # Update the running status
+        status_data['running'] = running
+        status_data['timestamp'] = current_time
+        
+        # Make sure we have both timestamps
+        if 'last_check_time' not in status_data:
+            status_data['last_check_time'] = current_time
+        else:
+            # Update last_check_time when running
+            if running:
+                status_data['last_check_time'] = current_time
+        
+        # Preserve last_dosing_time if it exists, otherwise initialize it
+        if 'last_dosing_time' not in status_data:
+            status_data['last_dosing_time'] = status_data.get('timestamp', current_time)
+        
+        write_status(status_data)
+        print(f"Updated status file: {status_data}")
+    except Exception as e:
+        print(f"Error updating status file: {e}")
+
+
+def check_once():
+    """
+    Check for a running auto-dosing process and update the status file
+    
+    Returns:
+        PID of the process found, or 0
+    """
+    processes = find_auto_dosing_process()
+    
+    running = len(processes) > 0
+    print(f"Found auto-dosing processes: {processes}")
+    print(f"Auto-dosing is {'running' if running else 'not running'}")
+    
+    update_status(running, time.time())
+    return int(processes.split(None, 1)[0]) if running else 0
+
+
+def pid_alive(pid):
+    """Check whether a process exists without scanning the process table"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists but belongs to another user
+        return True
+    return True
+
+
+def watch(interval):
+    """
+    Keep the status file in line with the daemon until interrupted
+    
+    While the last daemon found is alive only its PID is probed; the process
+    table is scanned again once it exits. The status file is written only
+    when the running state changes. On busy systems, where a scan takes
+    longer, scans are spaced out so they stay within SCAN_DUTY_CYCLE.
+    
+    Args:
+        interval: Seconds between checks
+    """
+    pid = check_once()
+    while True:
+        time.sleep(interval)
+        if pid:
+            if pid_alive(pid):
+                continue
+            # The daemon we knew about exited; look for a replacement
+            pid = check_once()
+            continue
+        
+        started = time.monotonic()
+        found = find_auto_dosing_process()
+        if found:
+            pid = check_once()
+        else:
+            scan_time = time.monotonic() - started
+            time.sleep(max(0.0, scan_time / SCAN_DUTY_CYCLE - interval))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--watch", nargs="?", type=float, const=5.0, metavar="SECONDS",
+                        help="stay running and re-check every SECONDS (default 5)")
+    args = parser.parse_args()
+    
+    # Create data directory if it doesn't exist
+    os.makedirs(DATA_DIR, exist_ok=True)
+    
+    # Check for running auto-dosing processes
+    try:
+        if args.watch:
+            # Exit cleanly when stopped by a service manager
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+            watch(args.watch)
+        else:
+            check_once()
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        print(f"Error checking processes: {e}")
+        sys.exit(1)
+    
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -65,7 +65,9 @@ function startAutoDosing() {
   // Launch the auto dosing process
   autoDosing = spawn('python', ['auto_dosing_integration.py'], {
     detached: false, // Keep the process attached to parent
-    stdio: 'inherit'  // Share stdout/stderr with parent process
+    stdio: 'inherit',  // Share stdout/stderr with parent process
+    // Have the kernel stop the process if this server dies without cleaning up
+    env: { ...process.env, AUTO_DOSING_EXIT_WITH_PARENT: '1' }
   });
   
   // Handle events
@@ -50,7 +50,7 @@ async def main():
     ${command === 'enable' ? 'await enable_auto_dosing()' : ''}
     ${command === 'disable' ? 'await disable_auto_dosing()' : ''}
     ${command === 'status' ? 'result = get_auto_dosing_status()' : ''}
-    ${command === 'history' ? `result = get_auto_dosing_history(${args.limit || 50})` : ''}
+    ${command === 'history' ? `result = get_auto_dosing_history(${args.limit || 50}, ${args.since ? JSON.stringify(args.since) : 'None'})` : ''}
     
     ${command !== 'enable' && command !== 'disable' ? 'print(json.dumps(result))' : 'print(json.dumps({"success": True}))'}
 
@@ -130,7 +130,10 @@ export async function GET(request: NextRequest) {
     
     if (type === 'history') {
       const limit = parseInt(searchParams.get('limit') || '50', 10);
-      const history = await runAutoDoseCommand('history', { limit });
+      // Cursor returned by a previous history call; only newer entries are returned
+      const sinceParam = searchParams.get('since');
+      const since = sinceParam && /^\d+$/.test(sinceParam) ? sinceParam : undefined;
+      const history = await runAutoDoseCommand('history', { limit, since });
       
       return NextResponse.json({
         status: 'success',
@@ -1,6 +1,5 @@
 import { NextRequest, NextResponse } from 'next/server';
 import fs from 'fs/promises';
-import { existsSync } from 'fs';
 import path from 'path';
 import { ProfileSettings } from '@/app/hooks/useProfileData';
 
@@ -18,22 +17,69 @@ async function ensureDataDir() {
   }
 }
 
-// Helper to read profiles from file
-async function getProfiles(): Promise<ProfileSettings[]> {
+interface ProfileIndex {
+  mtimeMs: number;
+  size: number;
+  profiles: ProfileSettings[];
+  byName: Map<string, ProfileSettings>;
+}
+
+// Parsed profiles and active profile name, reused until their files change on disk.
+// The auto-dosing daemon reads the active profile every check interval.
+let profileIndexCache: ProfileIndex | null = null;
+let activeNameCache: { mtimeMs: number; size: number; name: string } | null = null;
+
+const EMPTY_INDEX: ProfileIndex = { mtimeMs: 0, size: 0, profiles: [], byName: new Map() };
+
+// Helper to read profiles from file, indexed by name
+async function getProfileIndex(): Promise<ProfileIndex> {
   try {
     await ensureDataDir();
+    const stats = await fs.stat(PROFILES_FILE);
+    if (profileIndexCache && profileIndexCache.mtimeMs === stats.mtimeMs && profileIndexCache.size === stats.size) {
+      return profileIndexCache;
+    }
+    
     const fileData = await fs.readFile(PROFILES_FILE, 'utf8');
-    return JSON.parse(fileData);
+    const profiles: ProfileSettings[] = JSON.parse(fileData);
+    const byName = new Map<string, ProfileSettings>();
+    for (const profile of profiles) {
+      // Keep the first profile with a given name, as a linear search would
+      if (!byName.has(profile.name)) {
+        byName.set(profile.name, profile);
+      }
+    }
+    profileIndexCache = { mtimeMs: stats.mtimeMs, size: stats.size, profiles, byName };
+    return profileIndexCache;
   } catch (error) {
-    // If file doesn't exist or has invalid JSON, return empty array
-    return [];
+    // If file doesn't exist or has invalid JSON, return no profiles
+    return EMPTY_INDEX;
   }
 }
 
+// Helper to read profiles from file
+async function getProfiles(): Promise<ProfileSettings[]> {
+  return (await getProfileIndex()).profiles;
+}
+
+// Helper to read the active profile name, re-parsing only when the file changes
+async function getActiveProfileName(): Promise<string> {
+  const stats = await fs.stat(ACTIVE_PROFILE_FILE);
+  if (activeNameCache && activeNameCache.mtimeMs === stats.mtimeMs && activeNameCache.size === stats.size) {
+    return activeNameCache.name;
+  }
+  
+  const fileData = await fs.readFile(ACTIVE_PROFILE_FILE, 'utf8');
+  const name = JSON.parse(fileData).activeName;
+  activeNameCache = { mtimeMs: stats.mtimeMs, size: stats.size, name };
+  return name;
+}
+
 // Helper to write profiles to file
 async function saveProfiles(profiles: ProfileSettings[]): Promise<void> {
   await ensureDataDir();
   await fs.writeFile(PROFILES_FILE, JSON.stringify(profiles, null, 2), 'utf8');
+  profileIndexCache = null;
 }
 
 // Helper to get active profile
@@ -42,8 +88,14 @@ async function getActiveProfile(): Promise<ProfileSettings | null> {
     await ensureDataDir();
     
     try {
-      // Check if file exists
-      if (!existsSync(ACTIVE_PROFILE_FILE)) {
+      // Read the existing file; a missing file shows up as ENOENT
+      let activeProfileName: string;
+      try {
+        activeProfileName = await getActiveProfileName();
+      } catch (readError) {
+        if ((readError as NodeJS.ErrnoException).code !== 'ENOENT') {
+          throw readError;
+        }
         console.log("Active profile file doesn't exist, creating it with default values");
         
         // Get profiles
@@ -61,13 +113,9 @@ async function getActiveProfile(): Promise<ProfileSettings | null> {
         return profiles.length > 0 ? profiles[0] : null;
       }
       
-      // Read the existing file
-      const fileData = await fs.readFile(ACTIVE_PROFILE_FILE, 'utf8');
-      const activeProfileName = JSON.parse(fileData).activeName;
-      
       // Find the profile with this name
-      const profiles = await getProfiles();
-      return profiles.find(p => p.name === activeProfileName) || (profiles.length > 0 ? profiles[0] : null);
+      const { profiles, byName } = await getProfileIndex();
+      return byName.get(activeProfileName) || (profiles.length > 0 ? profiles[0] : null);
     } catch (error) {
       console.log(`Error reading active profile file: ${error instanceof Error ? error.message : String(error)}`);
       // If file doesn't exist or has invalid JSON, return the first profile
@@ -86,8 +134,7 @@ async function setActiveProfile(profileName: string): Promise<ProfileSettings |
   await ensureDataDir();
   
   // Find the profile with this name
-  const profiles = await getProfiles();
-  const profile = profiles.find(p => p.name === profileName);
+  const profile = (await getProfileIndex()).byName.get(profileName);
   
   if (!profile) {
     return null;
@@ -95,6 +142,7 @@ async function setActiveProfile(profileName: string): Promise<ProfileSettings |
   
   // Save active profile name to file
   await fs.writeFile(ACTIVE_PROFILE_FILE, JSON.stringify({ activeName: profileName }, null, 2), 'utf8');
+  activeNameCache = null;
   return profile;
 }
 
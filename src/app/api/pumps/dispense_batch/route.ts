@@ -0,0 +1,127 @@
+import { NextRequest, NextResponse } from 'next/server';
+import {
+  dispensePump,
+  loadPumpConfig,
+  PumpName,
+  getAllPumpStatus,
+  getRecentEvents
+} from '../../../lib/pumps';
+import { error, info } from '@/app/lib/logger';
+
+const MODULE = 'api:pumps:dispense_batch';
+
+const VALID_PUMPS = ['pH Up', 'pH Down', 'Pump 1', 'Pump 2', 'Pump 3', 'Pump 4'];
+
+interface BatchDose {
+  pump: string;
+  amount: number;
+  flowRate: number;
+}
+
+/**
+ * Validate a single dose, returning an error message or null if it is valid
+ */
+function validateDose(dose: BatchDose, index: number): string | null {
+  if (!dose || !dose.pump || dose.amount === undefined || dose.amount === null ||
+      dose.flowRate === undefined || dose.flowRate === null) {
+    return `Dose ${index}: missing required parameters (pump, amount, flowRate)`;
+  }
+  if (!VALID_PUMPS.includes(dose.pump)) {
+    return `Dose ${index}: invalid pump name`;
+  }
+  if (typeof dose.amount !== 'number' || dose.amount <= 0 || typeof dose.flowRate !== 'number' || dose.flowRate <= 0) {
+    return `Dose ${index}: amount and flowRate must be positive numbers`;
+  }
+  return null;
+}
+
+/**
+ * POST endpoint for dispensing several doses in one request
+ * Doses run back to back in order; callers that need mixing time between doses
+ * send them as separate requests
+ */
+export async function POST(request: NextRequest) {
+  try {
+    // Ensure configuration is loaded before dispensing
+    loadPumpConfig();
+
+    const data = await request.json();
+    const doses: BatchDose[] = data?.doses;
+
+    if (!Array.isArray(doses) || doses.length === 0) {
+      error(MODULE, 'Missing or empty doses list');
+      return NextResponse.json(
+        { status: 'error', error: 'Request must include a non-empty doses list' },
+        { status: 400 }
+      );
+    }
+
+    // Validate every dose before any pump runs so a bad entry can't leave a partial cycle
+    for (let i = 0; i < doses.length; i++) {
+      const validationError = validateDose(doses[i], i);
+      if (validationError) {
+        error(MODULE, 'Invalid dose in batch', validationError);
+        return NextResponse.json(
+          { status: 'error', error: validationError },
+          { status: 400 }
+        );
+      }
+    }
+
+    info(MODULE, `Batch dispense request: ${doses.length} doses`);
+
+    let dispensed = 0;
+    try {
+      for (let i = 0; i < doses.length; i++) {
+        // Stop once the caller has gone away (e.g. the auto-dosing daemon was stopped)
+        if (request.signal.aborted) {
+          info(MODULE, `Batch request aborted by client after ${dispensed} of ${doses.length} doses`);
+          break;
+        }
+        const { pump, amount, flowRate } = doses[i];
+        info(MODULE, `Dispensing ${amount}ml from ${pump} at ${flowRate}ml/s`);
+        await dispensePump(pump as PumpName, amount, flowRate);
+        dispensed++;
+      }
+    } catch (dispenseError) {
+      error(MODULE, 'Error dispensing batch', dispenseError);
+      return NextResponse.json(
+        {
+          status: 'error',
+          error: 'Failed to dispense batch',
+          dispensed,
+          details: dispenseError instanceof Error ? dispenseError.message : String(dispenseError)
+        },
+        { status: 500 }
+      );
+    }
+
+    return NextResponse.json({
+      status: 'success',
+      message: `Successfully dispensed ${dispensed} doses`,
+      dispensed,
+      pumpStatus: getAllPumpStatus(),
+      recentEvents: getRecentEvents(5),
+      timestamp: new Date().toISOString()
+    });
+  } catch (err) {
+    error(MODULE, 'Error processing batch dispense request', err);
+    return NextResponse.json(
+      {
+        status: 'error',
+        error: 'Failed to process batch dispense request',
+        details: err instanceof Error ? err.message : String(err)
+      },
+      { status: 500 }
+    );
+  }
+}
+
+// Also support GET method for testing purposes
+export async function GET() {
+  return NextResponse.json({
+    status: 'success',
+    message: 'Batch dispense endpoint is available',
+    usage: 'Send a POST request with { "doses": [{ "pump": "Pump 1", "amount": 5, "flowRate": 1 }] }'
+  });
+}